@@ -6,7 +6,7 @@
 
 import bpy
 from .export_csv import ExportCSVFile
-from .direct_x import ExportDirectXXFile, ImportDirectXXFile
+from .direct_x import CatalogDirectXXFiles, ExportDirectXXFile, ImportDirectXXFile, ImportDirectXXFileFromZip, XArchiveMember
 
 # locale
 #    (target_context, key): translated_str
@@ -28,12 +28,33 @@ translations_dict = {
         ("*", "This plug-in is for Bve. So some features are not supported."): "このプラグインはBve向けです。そのため、一部の機能はサポートされていません。",
         ("*", "For OpenBVE"): "OpenBVE向け",
         ("*", "Decal transparent color"): "テクスチャの透過色",
+        ("*", "Compression level"): "圧縮レベル",
+        ("*", "Use compression history"): "圧縮履歴を使用する",
+        ("*", "Parallel parsing"): "並列に解析する",
+        ("*", "Index file name"): "索引ファイル名",
+        ("*", "Use parse cache"): "解析キャッシュを使用する",
+        ("*", "Cache size (MB)"): "キャッシュサイズ(MB)",
+        ("*", "Reuse materials from previous imports"): "以前のインポートのマテリアルを再利用する",
+        ("*", "Reuse identical meshes from previous imports"): "以前のインポートの同じメッシュを再利用する",
+        ("*", "Import all X files in the folder"): "フォルダー内のすべてのXファイルをインポートする",
+        ("*", "No X files were found"): "Xファイルが見つかりませんでした",
+        ("*", "Imported %d X files (%d errors)"): "%d個のXファイルをインポートしました(エラー: %d個)",
+        ("*", "Import in the background"): "バックグラウンドでインポートする",
+        ("*", "Import cancelled"): "インポートを取り消しました",
+        ("*", "%d / %d files, %.1f / %.1f MB parsed, %d / %d blocks, %d meshes built"): "ファイル: %d / %d、解析済み: %.1f / %.1f MB、ブロック: %d / %d、作成済みメッシュ: %d",
+        ("*", "Split objects by material"): "マテリアルごとにオブジェクトを分ける",
+        ("*", "Only remove data created by this add-on"): "このアドオンで作成したデータのみ削除する",
+        ("*", "Cataloged %d X files (%d errors)"): "%d個のXファイルの一覧を作成しました(エラー: %d個)",
+        ("*", "Validate and repair meshes"): "メッシュを検証して修正する",
+        ("*", "Repaired meshes: %d faces with invalid vertex indexes removed, %d faces with repeated vertices fixed, %d degenerate faces removed, %d duplicate faces removed, %d missing and %d invalid material indexes fixed, %d UV count mismatches fixed"): "メッシュを修正しました: 範囲外の頂点インデックスを含む面を%d個削除、頂点が重複した面を%d個修正、縮退した面を%d個削除、重複した面を%d個削除、マテリアルのインデックスの不足を%d個、範囲外を%d個修正、UVの数の不一致を%d個修正",
     }
 }
 
 # メニューに追加 / Add to the menu
 def menu_func_import(self, context):
     self.layout.operator(ImportDirectXXFile.bl_idname, text="DirectX XFile (.x) for BVE")
+    self.layout.operator(ImportDirectXXFileFromZip.bl_idname, text="DirectX XFile in zip (.zip) for BVE")
+    self.layout.operator(CatalogDirectXXFiles.bl_idname, text="DirectX XFile catalog (.json) for BVE")
 
 
 def menu_func_export(self, context):
@@ -42,6 +63,9 @@ def menu_func_export(self, context):
 
 classes = (
     ImportDirectXXFile,
+    XArchiveMember,
+    ImportDirectXXFileFromZip,
+    CatalogDirectXXFiles,
     ExportDirectXXFile,
     ExportCSVFile,
 )
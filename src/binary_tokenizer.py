@@ -0,0 +1,126 @@
+from array import array
+
+try:
+    from .utility import ByteReader
+except ImportError:
+    from utility import ByteReader
+
+TOKEN_NAME = 1
+TOKEN_STRING = 2
+TOKEN_INTEGER = 3
+TOKEN_GUID = 5
+TOKEN_INTEGER_LIST = 6
+TOKEN_FLOAT_LIST = 7
+
+TOKEN_OBRACE = 0x0A
+TOKEN_CBRACE = 0x0B
+TOKEN_OPAREN = 0x0C
+TOKEN_CPAREN = 0x0D
+TOKEN_OBRACKET = 0x0E
+TOKEN_CBRACKET = 0x0F
+TOKEN_OANGLE = 0x10
+TOKEN_CANGLE = 0x11
+TOKEN_DOT = 0x12
+TOKEN_COMMA = 0x13
+TOKEN_SEMICOLON = 0x14
+TOKEN_TEMPLATE = 0x1F
+TOKEN_WORD = 0x28
+TOKEN_DWORD = 0x29
+TOKEN_FLOAT = 0x2A
+TOKEN_DOUBLE = 0x2B
+TOKEN_CHAR = 0x2C
+TOKEN_UCHAR = 0x2D
+TOKEN_SWORD = 0x2E
+TOKEN_SDWORD = 0x2F
+TOKEN_VOID = 0x30
+TOKEN_LPSTR = 0x31
+TOKEN_UNICODE = 0x32
+TOKEN_CSTRING = 0x33
+TOKEN_ARRAY = 0x34
+
+
+# バイナリ形式のXファイルのトークン索引 / Token index of a binary X file
+# 1回目の走査でトークンの種類、データの位置、対応する括弧の位置だけを記録し、値は必要になった時に読み込む /
+#  The first pass only records the kind, payload offset and matching brace of each token, values are decoded on demand
+class BinaryTokenIndex:
+
+    def __init__(self, reader: ByteReader, float_size=32):
+        self.reader = reader
+        self.float_size = float_size
+        self.kinds = array('H')
+        self.offsets = array('Q')
+        # 括弧の場合は対応する括弧のトークン番号、それ以外は-1 / Index of the matching brace for braces, -1 otherwise
+        self.links = array('q')
+        # トークンの種類ごとのデータ長 (固定長, 要素の長さ) / Payload size by token kind (fixed size, element size)
+        # 要素の長さが0でなければ、データの先頭に要素数が入っている / If the element size is not 0, the payload starts with the element count
+        self.payload_sizes = {
+            TOKEN_NAME: (0, 1),
+            TOKEN_STRING: (0, 1),
+            TOKEN_INTEGER: (4, 0),
+            TOKEN_GUID: (16, 0),
+            TOKEN_INTEGER_LIST: (0, 4),
+            TOKEN_FLOAT_LIST: (0, 8 if float_size == 64 else 4),
+        }
+        self.build()
+
+    def build(self):
+        reader = self.reader
+        kinds = self.kinds
+        offsets = self.offsets
+        links = self.links
+        payload_sizes = self.payload_sizes
+        no_payload = (0, 0)
+        braces = []
+        while reader.has_remaining():
+            kind = reader.get_short()
+            index = len(kinds)
+            kinds.append(kind)
+            offsets.append(reader.pos)
+            links.append(-1)
+            fixed_size, element_size = payload_sizes.get(kind, no_payload)
+            if element_size != 0:
+                reader.skip(fixed_size + reader.get_int() * element_size)
+            elif fixed_size != 0:
+                reader.skip(fixed_size)
+            elif kind == TOKEN_OBRACE:
+                braces.append(index)
+            elif kind == TOKEN_CBRACE and len(braces) > 0:
+                start = braces.pop()
+                links[start] = index
+                links[index] = start
+        if reader.pos > reader.length():
+            raise Exception("Unexpected end of file")
+        # 閉じられていない括弧はファイルの終わりまでとする / Unclosed braces extend to the end of the file
+        for start in braces:
+            links[start] = len(kinds)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # 対応する括弧のトークン番号 / Index of the matching brace
+    def match(self, index):
+        return self.links[index]
+
+    def get_integer(self, index):
+        self.reader.pos = self.offsets[index]
+        return self.reader.get_int()
+
+    def get_string(self, index):
+        self.reader.pos = self.offsets[index]
+        return self.reader.get_string(self.reader.get_int())
+
+    def get_int_list(self, index):
+        self.reader.pos = self.offsets[index]
+        return self.reader.get_int_list(self.reader.get_int())
+
+    # 整数のリストのうち1つの要素だけを読み込む / Read only one item of an integer list
+    def get_int_list_item(self, index, item):
+        self.reader.pos = self.offsets[index]
+        if item >= self.reader.get_int():
+            raise Exception("Unexpected end of number list")
+        self.reader.skip(item * 4)
+        return self.reader.get_int()
+
+    def get_float_list(self, index):
+        self.reader.pos = self.offsets[index]
+        return self.reader.get_float_list(self.reader.get_int(), self.float_size)
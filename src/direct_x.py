@@ -1,84 +1,47 @@
 import re
 import mathutils
 import struct
-import zlib
 import os
-import re
+import tempfile
+import zipfile
+import hashlib
+import queue
+import threading
+import time
 from typing import Self
 import bpy
-from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty
+import numpy as np
+from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty, IntProperty, CollectionProperty
 from bpy_extras.io_utils import ImportHelper, ExportHelper
-import zlib
-from typing import Self
 
 from .utility import float_to_str, vertex_to_str
 from . import utility
+from . import mszip
 from .model_data_utility import ModelDataUtility
-
-TOKEN_NAME = 1
-TOKEN_STRING = 2
-TOKEN_INTEGER = 3
-TOKEN_GUID = 5
-TOKEN_INTEGER_LIST = 6
-TOKEN_FLOAT_LIST = 7
-
-TOKEN_OBRACE = 0x0A
-TOKEN_CBRACE = 0x0B
-TOKEN_OPAREN = 0x0C
-TOKEN_CPAREN = 0x0D
-TOKEN_OBRACKET = 0x0E
-TOKEN_CBRACKET = 0x0F
-TOKEN_OANGLE = 0x10
-TOKEN_CANGLE = 0x11
-TOKEN_DOT = 0x12
-TOKEN_COMMA = 0x13
-TOKEN_SEMICOLON = 0x14
-TOKEN_TEMPLATE = 0x1F
-TOKEN_WORD = 0x28
-TOKEN_DWORD = 0x29
-TOKEN_FLOAT = 0x2A
-TOKEN_DOUBLE = 0x2B
-TOKEN_CHAR = 0x2C
-TOKEN_UCHAR = 0x2D
-TOKEN_SWORD = 0x2E
-TOKEN_SDWORD = 0x2F
-TOKEN_VOID = 0x30
-TOKEN_LPSTR = 0x31
-TOKEN_UNICODE = 0x32
-TOKEN_CSTRING = 0x33
-TOKEN_ARRAY = 0x34
-
-class XModelMesh:
-    vertices = []
-    faces: list[list[int]] = []
-    tex_coords = []
-    normals = []
-    normal_faces = []
-    materials = []
-    material_face_indexes = []
-    material_count = 0
-
-    def __init__(self):
-        self.vertices = []
-        self.faces = []
-        self.tex_coords = []
-        self.normals = []
-        self.normal_faces = []
-        self.materials = []
-        self.material_face_indexes = []
-        self.material_count = 0
-
-class XModelNode:
-    node_name: str | None
-    transform_matrix: mathutils.Matrix = mathutils.Matrix.Identity(4)
-    mesh: XModelMesh = XModelMesh()
-    children: list[Self] = []
-
-    def __init__(self):
-        self.node_name: str | None = ""
-        self.transform_matrix = mathutils.Matrix.Identity(4)
-        self.mesh = XModelMesh()
-        self.children = []
+from . import x_parser
+from . import x_catalog
+from . import parse_cache
+from . import x_archive
+from . import x_validation
+from .x_parser import XModelMesh, XModelNode, XMaterial
+from .binary_tokenizer import (
+    TOKEN_NAME,
+    TOKEN_STRING,
+    TOKEN_GUID,
+    TOKEN_INTEGER_LIST,
+    TOKEN_FLOAT_LIST,
+    TOKEN_OBRACE,
+    TOKEN_CBRACE,
+    TOKEN_OBRACKET,
+    TOKEN_CBRACKET,
+    TOKEN_DOT,
+    TOKEN_SEMICOLON,
+    TOKEN_TEMPLATE,
+    TOKEN_DWORD,
+    TOKEN_FLOAT,
+    TOKEN_LPSTR,
+    TOKEN_ARRAY,
+)
 
 class XElement:
     element_type = ""
@@ -87,14 +50,6 @@ class XElement:
     end_line_num = 0
     name = ""
 
-class XMaterial:
-    face_color: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0)
-    power: float = 0.0
-    specular_color: tuple[float, float, float] = (0.0, 0.0, 0.0)
-    emission_color: tuple[float, float, float] = (0.0, 0.0, 0.0)
-    texture_path: str | None = ""
-    name: str | None = ""
-
 def to_XElement(x_model_file_string, start_line_num):
     element_type = ""
     elem_data = ""
@@ -183,6 +138,652 @@ def write_float_list(f, f_list):
         write_float(f, i)
         
 
+# 解析したXファイルからBlenderのオブジェクトを作成する / Create Blender objects from a parsed X file
+# 同じ設定のマテリアルと同じテクスチャの画像を使い回すためのキャッシュ / Cache to reuse materials with the same settings and images of the same textures
+class MaterialCache:
+
+    def __init__(self):
+        # マテリアルの設定 -> マテリアル / Material settings -> material
+        self.materials = {}
+        # テクスチャの場所 -> 画像 / Location of a texture -> image
+        self.images = {}
+
+    def clear(self):
+        self.materials.clear()
+        self.images.clear()
+
+    def get_material(self, key: tuple):
+        return get_valid_item(self.materials, key)
+
+    def get_image(self, key: tuple):
+        return get_valid_item(self.images, key)
+
+
+# 削除済みのデータはキャッシュから取り除く / Drop data that has already been removed from the cache
+def get_valid_item(items: dict, key: tuple):
+    item = items.get(key)
+    if item is None:
+        return None
+    try:
+        item.name
+    except ReferenceError:
+        del items[key]
+        return None
+    return item
+
+
+# インポートをまたいでマテリアルを使い回す場合のキャッシュ / Cache used when materials are reused across imports
+shared_material_cache = MaterialCache()
+
+
+# 形状とマテリアルが同じXModelMeshから作成したメッシュを使い回すための索引 /
+#  Index to reuse the meshes created from XModelMeshes with the same geometry and materials
+class MeshIndex:
+
+    def __init__(self):
+        # 内容のハッシュ -> 作成したメッシュのリスト / Content hash -> list of the created meshes
+        self.meshes = {}
+
+    def clear(self):
+        self.meshes.clear()
+
+    def get(self, key: bytes) -> list | None:
+        meshes = self.meshes.get(key)
+        if meshes is None:
+            return None
+        # 1つでも削除されていたら作り直す / Create them again if any of them has been removed
+        for mesh in meshes:
+            try:
+                mesh.name
+            except ReferenceError:
+                del self.meshes[key]
+                return None
+        return meshes
+
+
+# インポートをまたいでメッシュを使い回す場合の索引 / Index used when meshes are reused across imports
+shared_mesh_index = MeshIndex()
+
+
+class XImporter:
+
+    def __init__(self, scale: float = 1.0, gamma_correction: bool = True, material_cache: MaterialCache | None = None, split_by_material: bool = True, mesh_index: MeshIndex | None = None, validate: bool = True):
+        self.scale = scale
+        self.gamma_correction = gamma_correction
+        # マテリアルごとにオブジェクトを分けるか、1つのメッシュを1つのオブジェクトにするか /
+        #  Whether to split the objects by material or to make one object per mesh
+        self.split_by_material = split_by_material
+        self.material_cache = material_cache if material_cache is not None else MaterialCache()
+        self.mesh_index = mesh_index if mesh_index is not None else MeshIndex()
+        # オブジェクトを作成する前にメッシュを検証して修正するか / Whether to validate and repair the meshes before creating the objects
+        self.validate = validate
+        # これまでのインポートで修正した数 / Counts of the repairs in the imports so far
+        self.validation = x_validation.ValidationReport()
+        # これまでのインポートで作成したメッシュの数(再利用したものは含まない) / Number of meshes created in the imports so far (reused ones are not included)
+        self.meshes_created = 0
+        self.object_index = 0
+        # Xファイルのパス(アーカイブ内の場合はアーカイブ内のパス) / Path of the X file (the path in the archive for archive members)
+        self.source_path = ""
+        # テクスチャを読み込むアーカイブ / Archive to load the textures from
+        self.archive: x_archive.XArchive | None = None
+        # 作成したがまだシーンに追加していないオブジェクト / Objects created but not yet added to the scene
+        self.objects = []
+        # XModelMeshのid -> (XModelMesh, 作成したメッシュ) / XModelMesh id -> (XModelMesh, created meshes)
+        # 同じメッシュを参照するノードはメッシュを共有する(リンク複製) / Nodes referring to the same mesh share the meshes (linked duplicates)
+        self.meshes = {}
+
+    # Xファイルを読み込み、オブジェクトを作成する / Load an X file and create the objects
+    # source はファイルのパス、バイト列、またはファイルオブジェクト / source is a file path, a bytes-like object or a file object
+    def import_source(self, source, source_path: str | None = None, parallel: bool = False, archive: x_archive.XArchive | None = None):
+        if source_path is None:
+            source_path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else ""
+        self.import_node(parse_source(source, parallel), source_path, archive)
+
+    def import_node(self, root_node: XModelNode, source_path: str, archive: x_archive.XArchive | None = None):
+        for _ in self.import_node_steps(root_node, source_path, archive):
+            pass
+
+    # ノードを1つ作成するたびに止まりながらインポートする / Import while pausing after each node
+    # メインスレッドで時間を区切ってオブジェクトを作成するために使う / Used to create the objects in time slices on the main thread
+    def import_node_steps(self, root_node: XModelNode, source_path: str, archive: x_archive.XArchive | None = None):
+        self.source_path = source_path
+        self.archive = archive
+        self.objects = []
+        self.meshes = {}
+        if self.validate:
+            # データブロックを作成する前に壊れた面を修正する / Repair broken faces before creating any data-blocks
+            x_validation.validate_node(root_node, self.validation)
+        yield from self.create_obj_from_node(root_node)
+        self.link_objects()
+
+    # 作成したオブジェクトをファイルごとのコレクションにまとめてシーンに追加する /
+    #  Add the created objects to the scene at once in a collection for the file
+    # ビューレイヤーの更新は呼び出し側がすべてのファイルの後に1回だけ行う /
+    #  The caller updates the view layer only once after all files
+    def link_objects(self):
+        collection = mark_imported(bpy.data.collections.new(self.get_source_name() or "XFile"))
+        for obj in self.objects:
+            collection.objects.link(obj)
+        self.objects = []
+        # コレクションをシーンに追加 / Add collection to scene
+        bpy.context.scene.collection.children.link(collection)
+        return collection
+
+    # オブジェクト名に使うファイル名 / File name used for the object names
+    def get_source_name(self):
+        return os.path.splitext(os.path.basename(self.source_path.replace("\\", "/")))[0]
+
+    # テクスチャの画像の場所を決める / Resolve the location of the image of a texture
+    # アーカイブ内の場合は (zipファイル, アーカイブ内の名前)、それ以外は (画像のパス,) を返す /
+    #  Returns (zip file, name in the archive) for archive members, otherwise (image path,)
+    def resolve_texture(self, texture_path: str | None) -> tuple | None:
+        if not texture_path:
+            return None
+        if self.archive is not None:
+            # アーカイブ内のXファイルからの相対パス / Path relative to the X file in the archive
+            name = self.archive.resolve(self.source_path, texture_path)
+            if name is not None:
+                return self.archive.zip_file.filename, name
+        else:
+            path = "/".join(os.path.abspath(self.source_path).split(os.path.sep)[0:-1])
+            path = path + "/" + texture_path
+            if os.path.exists(path):
+                texture_path = path
+        if os.path.exists(texture_path):
+            return (os.path.abspath(texture_path),)
+        return None
+
+    # テクスチャの画像を読み込む / Load the image of a texture
+    # 同じ場所の画像は一度だけ読み込む / Images at the same location are loaded only once
+    def load_texture(self, texture_key: tuple | None):
+        if texture_key is None:
+            return None
+        image = self.material_cache.get_image(texture_key)
+        if image is not None:
+            return image
+        if len(texture_key) == 2:
+            image = load_image_from_data(texture_key[1], self.archive.read(texture_key[1]))
+        else:
+            # 画像を読み込み / Load image
+            image = mark_imported(bpy.data.images.load(filepath=texture_key[0]))
+        self.material_cache.images[texture_key] = image
+        return image
+
+    # マテリアルを取得する / Get a material
+    # 色、反射、放射、テクスチャが同じマテリアルは使い回す / Materials with the same colors, reflection, emission and texture are reused
+    def get_material(self, x_material: XMaterial, available_material: bool, model_name: str):
+        key = self.get_material_key(x_material, available_material)
+        material = self.material_cache.get_material(key)
+        if material is None:
+            material = self.create_material(x_material, available_material, model_name, key[5])
+            self.material_cache.materials[key] = material
+        return material
+
+    # 同じ見た目になるマテリアルで同じになるキー / Key that is equal for materials that look the same
+    def get_material_key(self, x_material: XMaterial, available_material: bool) -> tuple:
+        return (
+            available_material,
+            tuple(x_material.face_color),
+            x_material.power,
+            tuple(x_material.specular_color),
+            tuple(x_material.emission_color),
+            self.resolve_texture(x_material.texture_path),
+            self.gamma_correction,
+        )
+
+    # マテリアルを作成 / Create material
+    def create_material(self, x_material: XMaterial, available_material: bool, model_name: str, texture_key: tuple | None):
+        material_name = model_name + "Material"
+        if x_material.name:
+            material_name = x_material.name
+        material = mark_imported(bpy.data.materials.new(material_name))
+
+        # ブレンドモードの設定 / Setting the blend mode
+        material.blend_method = 'CLIP'
+
+        # ノードを有効化 / Enable nodes
+        material.use_nodes = True
+        nodes = material.node_tree.nodes
+        # プリンシプルBSDFを取得 / Get the principle BSDF
+        principled = next(n for n in nodes if n.type == 'BSDF_PRINCIPLED')
+
+        color = (1.0, 1.0, 1.0)
+        material.specular_intensity = 0.0
+        if available_material:
+            color = x_material.face_color
+            material.specular_intensity = x_material.power
+            material.specular_color = x_material.specular_color
+            principled.inputs['Base Color'].default_value = color
+            principled.inputs['Alpha'].default_value = x_material.face_color[3]
+        material.diffuse_color = color
+
+        # 鏡面反射 / Specular reflection
+        principled.inputs['Specular IOR Level'].default_value = x_material.power
+        principled.inputs['Specular Tint'].default_value = (*x_material.specular_color, 1.0)
+        # 放射を設定 / Set emission
+        principled.inputs['Emission Color'].default_value = x_material.emission_color + (1.0,)
+
+        # テクスチャの紐付け / Linking textures
+        image = self.load_texture(texture_key)
+        if image is not None:
+            # 画像ノードを作成 / Create image node
+            texture = material.node_tree.nodes.new("ShaderNodeTexImage")
+            texture.location = (-300, 150)
+
+            texture.image = image
+            texture.image.colorspace_settings.name = 'sRGB'
+            # ベースカラーとテクスチャのカラーをリンクさせる / Link the base color and the texture color
+            material.node_tree.links.new(principled.inputs['Base Color'], texture.outputs['Color'])
+            # アルファとテクスチャのアルファをリンクさせる / Link the alpha and the texture alpha
+            material.node_tree.links.new(principled.inputs['Alpha'], texture.outputs['Alpha'])
+        elif self.gamma_correction:
+            # ガンマノードを作成 / Create gamma node
+            gamma_node = material.node_tree.nodes.new("ShaderNodeGamma")
+            gamma_node.location = (-250, 250)
+
+            gamma_node.inputs['Color'].default_value = color
+            gamma_node.inputs['Gamma'].default_value = 2.2
+            # ベースカラーとガンマのカラーをリンクさせる / Link the base color and the gamma color
+            material.node_tree.links.new(principled.inputs['Base Color'], gamma_node.outputs['Color'])
+        return material
+
+    # ノードからオブジェクトを作成する / Create the objects of a node
+    # Frame は変換行列を持つエンプティにし、その中のメッシュと子のFrameを子オブジェクトにする /
+    #  A Frame becomes an empty with its transform matrix, and its meshes and child Frames become its children
+    # ノードを1つ作成するたびに止まるジェネレーター / Generator that pauses after each node
+    def create_obj_from_node(self, node: XModelNode, parent=None):
+        if node.is_frame:
+            empty = self.create_object(node.node_name or self.get_source_name(), None)
+            empty.empty_display_type = 'PLAIN_AXES'
+            empty.matrix_basis = convert_matrix(node.transform_matrix, self.scale)
+            empty.parent = parent
+            parent = empty
+
+        for child in node.children:
+            yield from self.create_obj_from_node(child, parent)
+
+        # モデル名を決定 / Determine the model name
+        model_name = (node.node_name if node.node_name is not None and len(node.node_name) != 0 else self.get_source_name()) + str(self.object_index)
+        self.object_index += 1
+
+        for mesh in self.get_meshes(node.mesh, model_name):
+            obj = self.create_object(model_name, mesh)
+            obj.parent = parent
+        yield
+
+    # XModelMeshから作成したメッシュを取得する / Get the meshes created from an XModelMesh
+    # 共有されたXModelMeshや、形状とマテリアルが同じXModelMeshのメッシュは一度だけ作成する /
+    #  The meshes of a shared XModelMesh, or of XModelMeshes with the same geometry and materials, are created only once
+    def get_meshes(self, mesh: XModelMesh, model_name: str) -> list:
+        entry = self.meshes.get(id(mesh))
+        if entry is None:
+            key = self.get_mesh_key(mesh)
+            meshes = self.mesh_index.get(key)
+            if meshes is None:
+                meshes = self.create_meshes(mesh, model_name)
+                self.mesh_index.meshes[key] = meshes
+            entry = self.meshes[id(mesh)] = (mesh, meshes)
+        return entry[1]
+
+    # 形状、マテリアル、インポートの設定から内容のハッシュを計算する / Compute the content hash from the geometry, materials and import settings
+    def get_mesh_key(self, mesh: XModelMesh) -> bytes:
+        content = hashlib.sha1(repr((self.scale, self.split_by_material, mesh.material_count)).encode("utf-8"))
+        for values, dtype in (
+            (mesh.vertices, np.float64),
+            (mesh.face_indices, np.uint32),
+            (mesh.face_offsets, np.uint32),
+            (mesh.tex_coords, np.float64),
+            (mesh.material_face_indexes, np.uint32),
+        ):
+            content.update(len(values).to_bytes(8, "little"))
+            content.update(np.asarray(values, dtype=dtype).tobytes())
+        for x_material in mesh.materials:
+            content.update(repr(self.get_material_key(x_material, True)).encode("utf-8"))
+        return content.digest()
+
+    # メッシュを作成する / Create the meshes
+    # マテリアルごとに分ける場合はマテリアルごとのメッシュのリスト / A list of meshes per material when splitting by material
+    def create_meshes(self, mesh: XModelMesh, model_name: str) -> list:
+        # マテリアルのリストがないメッシュは作成しない / Meshes without a material list are not created
+        if mesh.material_count == 0:
+            return []
+        vertex_count = mesh.vertex_count()
+        face_offsets = np.asarray(mesh.face_offsets, dtype=np.int64)
+        loop_totals = np.diff(face_offsets)
+        # Xファイルに記述された実際の使用する頂点のインデックス(UV登録時に使用) / Actual vertex index used in the X file (used when registering UV)
+        # 面の向きを合わせるため、各面の頂点の順番を逆にする / The vertex order of each face is reversed to match the face orientation
+        loop_vertexes = reverse_faces(np.asarray(mesh.face_indices, dtype=np.int64), face_offsets, loop_totals)
+        if len(loop_vertexes) > 0 and loop_vertexes.max() >= vertex_count:
+            raise Exception("Vertex index out of range")
+
+        # 重複した座標は1つにまとめる / Combine duplicate coordinates into one
+        # 同じ座標の頂点には同じ番号を付ける(-0.0は0.0と同じ座標にする) / Vertices at the same coordinate get the same number (-0.0 is the same as 0.0)
+        positions = np.asarray(mesh.vertices, dtype=np.float64).reshape(-1, 3) + 0.0
+        vertex_groups = np.unique(positions, axis=0, return_inverse=True)[1].reshape(-1)
+        # Blenderに記録する際に使用する頂点のインデックス / Index of the vertex used when recording in Blender
+        loop_groups = vertex_groups[loop_vertexes]
+
+        # Vを反転する / Flip V
+        tex_coords = np.asarray(mesh.tex_coords, dtype=np.float32).reshape(-1, 2)
+        loop_uvs = np.zeros((len(loop_vertexes), 2), dtype=np.float32)
+        has_uv = loop_vertexes < len(tex_coords)
+        loop_uvs[has_uv] = tex_coords[loop_vertexes[has_uv]]
+        loop_uvs[:, 1] = 1.0 - loop_uvs[:, 1]
+
+        mesh_materials: list[XMaterial] = mesh.materials
+        material_count = mesh.material_count
+        face_materials = x_validation.get_face_materials(mesh, len(loop_totals))
+        loop_materials = np.repeat(face_materials, loop_totals)
+
+        if not self.split_by_material:
+            # 1つのオブジェクトにマテリアルスロットを並べる / Put the materials in the material slots of one object
+            used_materials = np.flatnonzero(np.bincount(face_materials, minlength=material_count)[:material_count])
+            if len(used_materials) == 0:
+                return []
+            # マテリアルのインデックス -> スロットの番号 / Material index -> slot number
+            slot_indexes = np.zeros(material_count, dtype=np.int32)
+            slot_indexes[used_materials] = np.arange(len(used_materials), dtype=np.int32)
+            faces = face_materials < material_count
+            loops = loop_materials < material_count
+            mesh = self.create_mesh(positions, loop_vertexes[loops], loop_groups[loops], loop_uvs[loops], loop_totals[faces])
+            mesh.polygons.foreach_set("material_index", slot_indexes[face_materials[faces]])
+            for j in used_materials:
+                # マテリアルの有無 / Presence or absence of materials
+                available_material = len(mesh_materials) > j
+                x_material = mesh_materials[j] if available_material else XMaterial()
+                mesh.materials.append(self.get_material(x_material, available_material, model_name))
+            return [mesh]
+
+        # マテリアルごとにメッシュを作成 / Create meshes for each material
+        meshes = []
+        for j in range(material_count):
+            faces = face_materials == j
+            if not faces.any():
+                continue
+            # マテリアルの有無 / Presence or absence of materials
+            available_material = len(mesh_materials) > j
+            x_material: XMaterial = mesh_materials[j] if available_material else XMaterial()
+            material = self.get_material(x_material, available_material, model_name)
+
+            # マテリアルが使う頂点と面だけを抽出 / Extract only the vertices and faces used by the material
+            loops = loop_materials == j
+            mesh = self.create_mesh(positions, loop_vertexes[loops], loop_groups[loops], loop_uvs[loops], loop_totals[faces])
+            mesh.materials.append(material)
+            meshes.append(mesh)
+        return meshes
+
+    # ループの配列からメッシュを作成する / Create a mesh from the loop arrays
+    # loop_groups は重複した座標をまとめた頂点の番号 / loop_groups are the vertex numbers with duplicate coordinates combined
+    def create_mesh(self, positions: np.ndarray, loop_vertexes: np.ndarray, loop_groups: np.ndarray, loop_uvs: np.ndarray, loop_totals: np.ndarray):
+        # 頂点データと面データを作成 / Create vertex data and face data
+        # 使われる頂点だけを抽出、その頂点のインデックスに合わせて面の頂点のインデックスを変更 /
+        #  Extract only the vertices that are used, and change the vertex indexes of the faces to match the indexes of those vertices
+        # 最初に使われた順に頂点の番号を付け直す / Renumber the vertices in the order they are first used
+        used_groups, first_loops, group_loops = np.unique(loop_groups, return_index=True, return_inverse=True)
+        order = np.argsort(first_loops)
+        new_indexes = np.empty(len(used_groups), dtype=np.int32)
+        new_indexes[order] = np.arange(len(used_groups), dtype=np.int32)
+        loop_data = new_indexes[group_loops.reshape(-1)]
+        # DirectX X Y Z
+        # Blender X Z Y
+        vertexes_data = positions[loop_vertexes[first_loops[order]]][:, (0, 2, 1)] * self.scale
+        loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+        np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+
+        # メッシュを作成 / Create mesh
+        mesh = mark_imported(bpy.data.meshes.new("mesh"))
+        self.meshes_created += 1
+
+        # メッシュに頂点と面のデータをまとめて挿入 / Insert vertex and face data into the mesh in bulk
+        mesh.vertices.add(len(vertexes_data))
+        mesh.vertices.foreach_set("co", vertexes_data.astype(np.float32).reshape(-1))
+        mesh.loops.add(len(loop_data))
+        mesh.loops.foreach_set("vertex_index", loop_data)
+        mesh.polygons.add(len(loop_starts))
+        mesh.polygons.foreach_set("loop_start", loop_starts)
+
+        # UVレイヤーの作成 / Create UV layer
+        uv = mesh.uv_layers.new(name="UVMap")
+        # UVデータを頂点と紐付ける / Link UV data to vertices
+        uv.data.foreach_set("uv", loop_uvs.reshape(-1))
+
+        mesh.update(calc_edges=True)
+        return mesh
+
+    # メッシュでオブジェクトを作成する / Create an object with the mesh
+    # シーンへの追加は link_objects でまとめて行う / The objects are added to the scene together in link_objects
+    def create_object(self, name: str, mesh):
+        obj = mark_imported(bpy.data.objects.new(name, mesh))
+        self.objects.append(obj)
+        return obj
+
+
+# Xファイルの変換行列をBlenderの行列に変換する / Convert a transform matrix of an X file to a Blender matrix
+# Xファイルは行ベクトルでY軸が上、Blenderは列ベクトルでZ軸が上のため、転置してYとZを入れ替える /
+#  X files use row vectors with Y up and Blender uses column vectors with Z up, so the matrix is transposed and Y and Z are swapped
+def convert_matrix(transform_matrix: list[list[float]], scale: float) -> mathutils.Matrix:
+    axes = (0, 2, 1, 3)
+    rows = [[transform_matrix[axes[j]][axes[i]] for j in range(4)] for i in range(4)]
+    for i in range(3):
+        rows[i][3] *= scale
+    return mathutils.Matrix(rows)
+
+
+# 各面の頂点の順番を逆にしたループの頂点の配列を作成する / Build the loop vertex array with the vertex order of each face reversed
+def reverse_faces(face_indices: np.ndarray, face_offsets: np.ndarray, loop_totals: np.ndarray) -> np.ndarray:
+    loop_faces = np.repeat(np.arange(len(loop_totals)), loop_totals)
+    # 面の開始位置 + 面の終了位置 - 1 - ループの位置 / Start of the face + end of the face - 1 - position of the loop
+    source = face_offsets[:-1][loop_faces] + face_offsets[1:][loop_faces] - 1 - np.arange(len(loop_faces))
+    return face_indices[source]
+
+
+# Xファイルを解析する / Parse an X file
+# source はファイルのパス、バイト列、またはファイルオブジェクト / source is a file path, a bytes-like object or a file object
+def parse_source(source, parallel: bool = False) -> XModelNode:
+    try:
+        return x_parser.parse(source, parallel)
+    except x_parser.NotXFileError:
+        raise Exception(bpy.app.translations.pgettext("This file is not X file!"))
+
+
+# 解析キャッシュを使ってファイルを解析する / Parse a file using the parse cache
+def parse_cached(path: str, cache: parse_cache.ParseCache | None, parallel: bool = False) -> XModelNode:
+    root_node = None
+    if cache is not None:
+        root_node = cache.get(path)
+    if root_node is None:
+        root_node = parse_source(path, parallel)
+        if cache is not None:
+            cache.put(path, root_node)
+    return root_node
+
+
+# 複数のファイルを順番に解析し、(パス, ノード, 例外) を返す / Parse multiple files in order, yielding (path, node, exception)
+# キャッシュにないファイルはワーカープロセスで先に解析しておき、その間にオブジェクトを作成できるようにする /
+#  Files not in the cache are parsed ahead in worker processes, so that objects can be created in the meantime
+def parse_files(paths: list[str], cache: parse_cache.ParseCache | None):
+    cached_paths = set()
+    # キャッシュを調べられなかったファイル(存在しないなど)のパス -> 例外 / Path of a file whose cache could not be looked up (missing and such) -> exception
+    errors = {}
+    if cache is not None:
+        for path in paths:
+            try:
+                if os.path.exists(cache.get_cache_path(path)):
+                    cached_paths.add(path)
+            except OSError as e:
+                errors[path] = e
+    parsed = x_parser.parse_files([path for path in paths if path not in cached_paths and path not in errors])
+    try:
+        for path in paths:
+            if path in errors:
+                yield path, None, errors[path]
+                continue
+            if path in cached_paths:
+                try:
+                    yield path, parse_cached(path, cache), None
+                except Exception as e:
+                    yield path, None, e
+                continue
+            path, root_node, error = next(parsed)
+            if root_node is not None and cache is not None:
+                cache.put(path, root_node)
+            yield path, root_node, error
+    finally:
+        parsed.close()
+
+
+# 別のスレッドでファイルを順番に解析し、(パス, ノード, 例外) を results に入れる。最後に None を入れる /
+#  Parse files in order on another thread, putting (path, node, exception) in results and None at the end
+# bpyはメインスレッド以外から使えないため、ここでは使わない / bpy cannot be used off the main thread, so it is not used here
+def parse_in_background(paths: list[str], cache: parse_cache.ParseCache | None, progress: x_parser.ParseProgress, results: queue.Queue):
+    try:
+        for path in paths:
+            try:
+                progress.start_file(os.path.getsize(path))
+                root_node = cache.get(path) if cache is not None else None
+                if root_node is None:
+                    root_node = x_parser.parse(path, progress=progress)
+                    if cache is not None:
+                        cache.put(path, root_node)
+                result = (path, root_node, None)
+            except x_parser.ParseCancelled:
+                raise
+            except Exception as e:
+                result = (path, None, e)
+            finally:
+                progress.finish_file()
+            put_result(results, result, progress)
+        put_result(results, None, progress)
+    except x_parser.ParseCancelled:
+        pass
+
+
+# 取り消されるまで、空きができるのを待って結果を入れる / Put a result, waiting for space until cancelled
+def put_result(results: queue.Queue, result, progress: x_parser.ParseProgress):
+    while True:
+        try:
+            results.put(result, timeout=BACKGROUND_TIMER_INTERVAL)
+            return
+        except queue.Full:
+            progress.check()
+
+
+def get_file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# 解析のエラーメッセージ / Error message of a parse
+def get_error_message(error: Exception) -> str:
+    if isinstance(error, x_parser.NotXFileError):
+        return bpy.app.translations.pgettext("This file is not X file!")
+    return str(error)
+
+
+# 検証で修正した数を表示する / Report the counts of the repairs made by the validation
+def report_validation(operator: bpy.types.Operator, validation: x_validation.ValidationReport):
+    if validation.total() == 0:
+        return
+    operator.report({'WARNING'}, bpy.app.translations.pgettext("Repaired meshes: %d faces with invalid vertex indexes removed, %d faces with repeated vertices fixed, %d degenerate faces removed, %d duplicate faces removed, %d missing and %d invalid material indexes fixed, %d UV count mismatches fixed") % (
+        validation.invalid_index_faces,
+        validation.repeated_vertex_faces,
+        validation.degenerate_faces,
+        validation.duplicate_faces,
+        validation.missing_material_indexes,
+        validation.invalid_material_indexes,
+        validation.uv_mismatches,
+    ))
+
+
+# Xファイルを読み込み、オブジェクトを作成する / Load an X file and create the objects
+# ファイルに保存されていないデータ(bytes)やファイルオブジェクトからも読み込める / Also accepts data (bytes) or file objects that are not saved to a file
+def import_x(source, source_path: str | None = None, scale: float = 1.0, gamma_correction: bool = True, parallel: bool = False, split_by_material: bool = True, validate: bool = True):
+    XImporter(scale, gamma_correction, split_by_material=split_by_material, validate=validate).import_source(source, source_path, parallel)
+    bpy.context.view_layer.update()
+
+
+# メモリ上の画像データを読み込み、blendファイルにパックする / Load image data in memory and pack it into the blend file
+def load_image_from_data(name: str, data: bytes):
+    image = mark_imported(bpy.data.images.new(os.path.basename(name), 8, 8))
+    image.pack(data=data, data_len=len(data))
+    image.source = 'FILE'
+    return image
+
+
+# バックグラウンドでのインポートで、一度にオブジェクトを作成する時間(秒) / Time spent creating objects at once in a background import (seconds)
+BACKGROUND_TIME_SLICE = 0.05
+# 進捗を確認する間隔(秒) / Interval to check the progress (seconds)
+BACKGROUND_TIMER_INTERVAL = 0.05
+# 作成を待っている解析済みのファイルの最大数 / Maximum number of parsed files waiting to be created
+BACKGROUND_QUEUE_SIZE = 2
+PROGRESS_STEPS = 1000
+
+# このアドオンで作成したデータに付けるカスタムプロパティ / Custom property set on the data created by this add-on
+IMPORTED_PROPERTY = "xfile_support_bve"
+
+
+def mark_imported(data):
+    data[IMPORTED_PROPERTY] = True
+    return data
+
+
+def is_imported(data) -> bool:
+    return bool(data.get(IMPORTED_PROPERTY, False))
+
+
+# すべてのオブジェクトとマテリアルを削除 / Delete all objects and materials
+# 使われなくなるメッシュと画像も含めて、batch_remove で一度に削除する /
+#  The meshes and images that would be left unused are included, and everything is deleted at once with batch_remove
+# imported_only の場合はこのアドオンで作成したデータだけを削除する / With imported_only, only the data created by this add-on is deleted
+def remove_all_objects_and_materials(imported_only: bool = False):
+    data_collections = (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.images, bpy.data.collections)
+    removed = {data for data_collection in data_collections for data in data_collection if is_imported(data)}
+    if not imported_only:
+        objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+        removed.update(objects)
+        removed.update(bpy.data.materials)
+        # 削除するオブジェクトとマテリアルだけが使っているメッシュと画像 / Meshes and images used only by the deleted objects and materials
+        removed.update(get_unused_data([obj.data for obj in objects]))
+        removed.update(get_unused_data([
+            node.image
+            for material in bpy.data.materials if material.node_tree is not None
+            for node in material.node_tree.nodes if getattr(node, "image", None) is not None
+        ]))
+    bpy.data.batch_remove(removed)
+    shared_material_cache.clear()
+    shared_mesh_index.clear()
+
+
+# 参照がすべて削除される場合に使われなくなるデータ / Data that will be unused when all of the given references are deleted
+# 参照されているデータだけを対象にし、フェイクユーザーのあるデータ(usersに含まれる)は残す /
+#  Only the referenced data is considered, and data with a fake user (counted in users) is kept
+def get_unused_data(references: list) -> list:
+    counts = {}
+    for data in references:
+        counts[data] = counts.get(data, 0) + 1
+    return [data for data, count in counts.items() if data.users <= count]
+
+
+# インポートで使うマテリアルのキャッシュ / Material cache used by an import
+# 使い回さない場合はインポートごとに新しいキャッシュを使う / A new cache is used for each import unless materials are reused across imports
+def get_material_cache(share_materials: bool) -> MaterialCache:
+    return shared_material_cache if share_materials else MaterialCache()
+
+
+# インポートで使うメッシュの索引 / Mesh index used by an import
+def get_mesh_index(share_meshes: bool) -> MeshIndex:
+    return shared_mesh_index if share_meshes else MeshIndex()
+
+# 解析キャッシュの保存先 / Directory of the parse cache
+def get_cache_directory():
+    try:
+        return bpy.utils.extension_path_user(__package__, path="parse_cache", create=True)
+    except (AttributeError, ValueError):
+        # 拡張機能としてインストールされていない場合 / When not installed as an extension
+        return os.path.join(tempfile.gettempdir(), "xfile_support_bve", "parse_cache")
+
 class ImportDirectXXFile(bpy.types.Operator, ImportHelper):
     bl_idname = "import.directx_x_for_bve"
     bl_description = 'Import from X file (.x)'
@@ -203,10 +804,28 @@ class ImportDirectXXFile(bpy.types.Operator, ImportHelper):
         options={'HIDDEN'},
     )
 
+    # ファイルブラウザーで選択した複数のファイル / Multiple files selected in the file browser
+    files: CollectionProperty(
+        type=bpy.types.OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+    directory: StringProperty(
+        subtype='DIR_PATH',
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+    import_directory: BoolProperty(
+        name="Import all X files in the folder",
+        default=False,
+    )
+
     remove_all: BoolProperty(
         name="Remove All Objects and Materials",
         default=True,
     )
+    remove_imported_only: BoolProperty(
+        name="Only remove data created by this add-on",
+        default=False,
+    )
 
     scale: FloatProperty(
         name="Scale",
@@ -218,648 +837,341 @@ class ImportDirectXXFile(bpy.types.Operator, ImportHelper):
         default=True,
     )
 
-    def __init__(self):
-        self.initialize()
-    
-    def initialize(self):
-        self.is_binary = False
-        self.float_size = 32
-        self.ret_string = ""
-        self.ret_integer = 0
-        self.ret_float = 0
-        self.ret_integer_list = []
-        self.ret_float_list = []
-        self.ret_uuid = ""
-        self.byte_buffer = utility.ByteBuffer(bytes())
-        self.text_content = ""
-        self.text_pos = 0
-        self.text_brace_count = 0
-        self.bin_brace_count = 0
-        self.object_index = 0
-    
-    def create_obj_from_node(self, matrix: mathutils.Matrix, node: XModelNode):
-        if matrix is None:
-            matrix = mathutils.Matrix.Identity(4)
+    parallel_parse: BoolProperty(
+        name="Parallel parsing",
+        default=False,
+    )
+    share_materials: BoolProperty(
+        name="Reuse materials from previous imports",
+        default=False,
+    )
+    share_meshes: BoolProperty(
+        name="Reuse identical meshes from previous imports",
+        default=False,
+    )
+    split_by_material: BoolProperty(
+        name="Split objects by material",
+        default=True,
+    )
+    validate_meshes: BoolProperty(
+        name="Validate and repair meshes",
+        default=True,
+    )
 
-        for child in node.children:
-            self.create_obj_from_node(matrix @ child.transform_matrix, child)
-
-        mesh = node.mesh
-
-        vertex_index = 0
-        mesh_vertexes = []
-        mesh_vertexes_redirect = {}
-        for vertex in mesh.vertices:
-            # DirectX X Y Z
-            # Blender X Z Y
-            vector = (vertex[0] * self.scale, vertex[2] * self.scale, vertex[1] * self.scale)
-            # 重複した座標は1つにまとめる / Combine duplicate coordinates into one
-            # リダイレクト先を登録しておく / Register the redirect destination
-            if vector in mesh_vertexes:
-                mesh_vertexes_redirect[vertex_index] = mesh_vertexes.index(vector)
-            else:
-                mesh_vertexes_redirect[vertex_index] = len(mesh_vertexes)
-                mesh_vertexes.append(vector)
-            vertex_index += 1
-            if vertex_index == len(mesh.vertices):
-                break
-        indexes_size = 0
-        mesh_faces = []
-        mesh_faces_exact = []
-        mesh_tex_coord = []
-        mesh_material_face_indexes = []
-        mesh_materials: list[XMaterial] = []
-        for indexes in mesh.faces:
-            # Blenderに記録する際に使用する頂点のインデックス / Index of the vertex used when recording in Blender
-            indexes.reverse()
-            vertexes = []
-            for l in range(len(indexes)):
-                if indexes[l] in mesh_vertexes_redirect:
-                    vertexes.append(mesh_vertexes_redirect[indexes[l]])
-                else:
-                    vertexes.append(indexes[l])
-            mesh_faces.append(vertexes)
-            # Xファイルに記述された実際の使用する頂点のインデックス(UV登録時に使用) / Actual vertex index used in the X file (used when registering UV)
-            mesh_faces_exact.append(indexes)
-            if len(mesh_faces) == indexes_size:
-                break
+    use_cache: BoolProperty(
+        name="Use parse cache",
+        default=False,
+    )
 
-        for vertex in mesh.tex_coords:
-            vertex[1] = -vertex[1] + 1
-            mesh_tex_coord.append(vertex)
-            
-        for index in mesh.material_face_indexes:
-            mesh_material_face_indexes.append(index)
-        
-        for material in mesh.materials:
-            mesh_materials.append(material)
-        material_faces: list[list[int]] = []
-        material_count = mesh.material_count
-        for i in range(material_count):
-            material_faces.append([])
+    cache_size: IntProperty(
+        name="Cache size (MB)",
+        default=256,
+        min=1,
+    )
 
-        # マテリアル別に面を整理 / Organize faces by material
-        if material_count > 0:
-            for i in range(len(mesh_faces)):
-                if len(mesh_material_face_indexes) <= i:
-                    mesh_material_face_indexes.append(0)
-                material_id = mesh_material_face_indexes[i]
-                material_faces[material_id].append(i)
+    run_in_background: BoolProperty(
+        name="Import in the background",
+        default=False,
+    )
 
-        # モデル名を決定 / Determine the model name
-        model_name = (node.node_name if node.node_name is not None and len(node.node_name) != 0 else os.path.splitext(os.path.basename(self.filepath))[0]) + str(self.object_index)
-        self.object_index += 1
+    # インポートするファイルのパス / Paths of the files to import
+    def get_paths(self) -> list[str]:
+        if self.import_directory:
+            # サブフォルダーも含める / Subfolders are included
+            return x_catalog.find_x_files(self.directory or os.path.dirname(self.filepath))
+        paths = [os.path.join(self.directory, file.name) for file in self.files if file.name]
+        if len(paths) == 0:
+            paths = [self.filepath]
+        return paths
 
-        # マテリアルごとにオブジェクトを作成 / Create objects for each material
-        for j in range(len(material_faces)):
-            faces_data = []
-            vertexes_data = []
-            faces = material_faces[j]
-            if len(faces) == 0:
+    def execute(self, context):
+        paths = self.get_paths()
+        if len(paths) == 0:
+            self.report({'WARNING'}, bpy.app.translations.pgettext("No X files were found"))
+            return {'CANCELLED'}
+
+        # すべてのオブジェクトとマテリアルを削除 / Delete all objects and materials
+        if self.remove_all:
+            remove_all_objects_and_materials(self.remove_imported_only)
+
+        cache = None
+        if self.use_cache:
+            cache = parse_cache.ParseCache(get_cache_directory(), self.cache_size * 1024 * 1024)
+        importer = XImporter(self.scale, self.gamma_correction, get_material_cache(self.share_materials), self.split_by_material, get_mesh_index(self.share_meshes), self.validate_meshes)
+
+        # UIのないBlenderではモーダルにできない / Modal operators are not possible in Blender without a UI
+        if self.run_in_background and not bpy.app.background:
+            return self.start_background(context, paths, cache, importer)
+
+        if len(paths) == 1:
+            # xファイルを読み込み / Load x file
+            importer.import_node(parse_cached(paths[0], cache, self.parallel_parse), paths[0])
+            bpy.context.view_layer.update()
+            report_validation(self, importer.validation)
+            return {'FINISHED'}
+
+        # 読み込めないファイルがあっても残りのファイルはインポートする / The remaining files are imported even if some files cannot be read
+        errors = 0
+        for path, root_node, error in parse_files(paths, cache):
+            if error is not None:
+                errors += 1
+                self.report({'WARNING'}, f"{path}: {get_error_message(error)}")
                 continue
-            # マテリアルの有無 / Presence or absence of materials
-            available_material = len(mesh_materials) > mesh_material_face_indexes[faces[0]]
-            x_material: XMaterial = mesh_materials[mesh_material_face_indexes[faces[0]]]
-            # マテリアルを作成 / Create material
-            material_name = model_name + "Material"
-            if x_material.name:
-                material_name = x_material.name
-            material = bpy.data.materials.new(material_name)
-
-            # ブレンドモードの設定 / Setting the blend mode
-            material.blend_method = 'CLIP'
-
-            # ノードを有効化 / Enable nodes
-            material.use_nodes = True
-            nodes = material.node_tree.nodes
-            # プリンシプルBSDFを取得 / Get the principle BSDF
-            principled = next(n for n in nodes if n.type == 'BSDF_PRINCIPLED')
-
-            color = (1.0, 1.0, 1.0)
-            material.specular_intensity = 0.0
-            if available_material:
-                color = x_material.face_color
-                material.specular_intensity = x_material.power
-                material.specular_color = x_material.specular_color
-                principled.inputs['Base Color'].default_value = color
-                principled.inputs['Alpha'].default_value = x_material.face_color[3]
-            material.diffuse_color = color
-
-            # 鏡面反射 / Specular reflection
-            principled.inputs['Specular IOR Level'].default_value = x_material.power
-            principled.inputs['Specular Tint'].default_value = (*x_material.specular_color, 1.0)
-            # 放射を設定 / Set emission
-            principled.inputs['Emission Color'].default_value = x_material.emission_color + (1.0,)
-
-            # テクスチャの紐付け / Linking textures
-            if x_material.texture_path and x_material.texture_path != "":
-                path = "/".join(os.path.abspath(self.filepath).split(os.path.sep)[0:-1])
-                path = path + "/" + x_material.texture_path
-                if os.path.exists(path):
-                    x_material.texture_path = path
-
-            if x_material.texture_path and os.path.exists(x_material.texture_path):
-                # 画像ノードを作成 / Create image node
-                texture = material.node_tree.nodes.new("ShaderNodeTexImage")
-                texture.location = (-300, 150)
-
-                # 画像を読み込み / Load image
-                texture.image = bpy.data.images.load(filepath=x_material.texture_path)
-                texture.image.colorspace_settings.name = 'sRGB'
-                # ベースカラーとテクスチャのカラーをリンクさせる / Link the base color and the texture color
-                material.node_tree.links.new(principled.inputs['Base Color'], texture.outputs['Color'])
-                # アルファとテクスチャのアルファをリンクさせる / Link the alpha and the texture alpha
-                material.node_tree.links.new(principled.inputs['Alpha'], texture.outputs['Alpha'])
-            elif self.gamma_correction:
-                # ガンマノードを作成 / Create gamma node
-                gamma_node = material.node_tree.nodes.new("ShaderNodeGamma")
-                gamma_node.location = (-250, 250)
-
-                gamma_node.inputs['Color'].default_value = color
-                gamma_node.inputs['Gamma'].default_value = 2.2
-                # ベースカラーとガンマのカラーをリンクさせる / Link the base color and the gamma color
-                material.node_tree.links.new(principled.inputs['Base Color'], gamma_node.outputs['Color'])
-
-            # 頂点データと面データを作成 / Create vertex data and face data
-            # マテリアルが使う頂点だけを抽出、その頂点のインデックスに合わせて面の頂点のインデックスを変更 /
-            #  Extract only the vertices used by the material, and change the vertex indexes of the faces to match the indexes of those vertices
-            mesh_indexes = {}
-            for i in faces:
-                face = mesh_faces[i]
-                # faces_data.append(face)
-                for k in face:
-                    if mesh_vertexes[k] in vertexes_data:
-                        mesh_indexes[k] = vertexes_data.index(mesh_vertexes[k])
+            importer.import_node(root_node, path)
+        # すべてのファイルを追加した後に1回だけ更新する / Update only once after all files are added
+        bpy.context.view_layer.update()
+        self.report({'INFO'}, bpy.app.translations.pgettext("Imported %d X files (%d errors)") % (len(paths) - errors, errors))
+        report_validation(self, importer.validation)
+        return {'FINISHED'}
+
+    # 解析を別のスレッドで行い、オブジェクトの作成はメインスレッドで時間を区切って行うモーダルなインポートを開始する /
+    #  Start a modal import that parses on another thread and creates the objects on the main thread in time slices
+    def start_background(self, context, paths: list[str], cache: parse_cache.ParseCache | None, importer: XImporter):
+        self.paths = paths
+        self.importer = importer
+        self.progress = x_parser.ParseProgress(sum(get_file_size(path) for path in paths))
+        self.results = queue.Queue(BACKGROUND_QUEUE_SIZE)
+        self.thread = threading.Thread(target=parse_in_background, args=(paths, cache, self.progress, self.results), daemon=True)
+        # 作成中のファイルのジェネレーター / Generator of the file being created
+        self.steps = None
+        self.files_done = 0
+        self.errors = 0
+        self.nodes_done = 0
+        self.nodes_total = 0
+        self.thread.start()
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(BACKGROUND_TIMER_INTERVAL, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, PROGRESS_STEPS)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        # Escで取り消す / Cancel with Esc
+        if event.type == 'ESC':
+            self.progress.cancelled = True
+            self.finish_background(context)
+            self.report({'WARNING'}, bpy.app.translations.pgettext("Import cancelled"))
+            # 作成済みのオブジェクトを元に戻せるようにする / Keep the objects created so far undoable
+            return {'FINISHED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        deadline = time.perf_counter() + BACKGROUND_TIME_SLICE
+        while time.perf_counter() < deadline:
+            if self.steps is None:
+                try:
+                    item = self.results.get_nowait()
+                except queue.Empty:
+                    if not self.thread.is_alive() and self.results.empty():
+                        # 解析するスレッドが予期せず終了した / The parsing thread ended unexpectedly
+                        item = None
                     else:
-                        mesh_indexes[k] = len(vertexes_data)
-                        vertexes_data.append(mesh_vertexes[k])
-                count = 0
-                face_data = [0] * len(face)
-                for k in face:
-                    face_data[count] = mesh_indexes[k]
-                    count += 1
-                faces_data.append(face_data)
-
-            # メッシュを作成 / Create mesh
-            mesh = bpy.data.meshes.new("mesh")
-
-            # メッシュに頂点と面のデータを挿入 / Insert vertex and face data into the mesh
-            mesh.from_pydata(vertexes_data, [], faces_data)
-
-            # UVレイヤーの作成 / Create UV layer
-            mesh.uv_layers.new(name="UVMap")
-            uv = mesh.uv_layers["UVMap"]
-
-            # UVデータを頂点と紐付ける / Link UV data to vertices
-            count = 0
-            for i in faces:
-                for k in mesh_faces_exact[i]:
-                    uv.data[count].uv = mesh_tex_coord[k]
-                    count += 1
-
-            mesh.update()
-
-            # メッシュでオブジェクトを作成 / Create an object with the mesh
-            obj = bpy.data.objects.new(model_name, mesh)
-            obj.data = mesh
-            obj.data.materials.append(material)
-
-            # オブジェクトをシーンに追加 / Add object to scene
-            scene = bpy.context.scene
-            scene.collection.objects.link(obj)
-
-    def parse_mesh_text(self, mesh: XModelMesh):
-        object_name = self.get_object_name_text()
-        vertex_size = self.get_next_int_text()
-        for _ in range(vertex_size):
-            vertex = [self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text()]
-            mesh.vertices.append(vertex)
-        faces_size = self.get_next_int_text()
-        for i in range(faces_size):
-            vertex_size = self.get_next_int_text()
-            indexes = []
-            for _ in range(vertex_size):
-                indexes.append(self.get_next_int_text())
-            mesh.faces.append(indexes)
-        
-        brace_count = self.text_brace_count
-        
-        token = self.get_next_token_text()
-        while token != None and self.text_brace_count >= brace_count:
-            if brace_count == self.text_brace_count:
-                if token == "MeshMaterialList":
-                    self.parse_mesh_material_list_text(mesh)
-                elif token == "MeshTextureCoords":
-                    self.parse_mesh_texture_coords_text(mesh)
-            token = self.get_next_token_text()
-
-    def parse_mesh_texture_coords_text(self, mesh: XModelMesh):
-        object_name = self.get_object_name_text()
-        vertex_size = self.get_next_int_text()
-        for _ in range(vertex_size):
-            uv = [self.get_next_float_text(), self.get_next_float_text()]
-            mesh.tex_coords.append(uv)
-
-    def parse_mesh_material_list_text(self, mesh: XModelMesh):
-        object_name = self.get_object_name_text()
-        mesh.material_count = self.get_next_int_text()
-        face_count = self.get_next_int_text()
-        for _ in range(face_count):
-            mesh.material_face_indexes.append(self.get_next_int_text())
-        
-        brace_count = self.text_brace_count
-        token = self.get_next_token_text()
-        while token != None and self.text_brace_count >= brace_count:
-            if brace_count == self.text_brace_count:
-                if token == "Material":
-                    self.parse_material_text(mesh)
-            token = self.get_next_token_text()
-
-    def parse_material_text(self, mesh: XModelMesh):
-        object_name = self.get_object_name_text()
-        color = (self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text())
-        power = self.get_next_float_text()
-        specular_color = (self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text())
-        self.skip_next_token_text(";")
-        emissive_color = (self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text())
-        material = XMaterial()
-        material.face_color = color
-        material.power = power
-        material.specular_color = specular_color
-        material.emission_color = emissive_color
-        material.name = object_name
-
-        brace_count = self.text_brace_count
-        token = self.get_next_token_text()
-        while token != None and self.text_brace_count >= brace_count:
-            if brace_count == self.text_brace_count:
-                if token == "TextureFilename":
-                    material.texture_path = self.get_next_string_text()
-                    self.skip_next_token_text(";")
-            token = self.get_next_token_text()
-        mesh.materials.append(material)
-    
-    def parse_frame_text(self, node: XModelNode):
-        child = XModelNode()
-        child.node_name = self.get_object_name_text()
-
-        brace_count = self.text_brace_count
-        token = self.get_next_token_text()
-        while token != None and self.text_brace_count >= brace_count:
-            if brace_count == self.text_brace_count:
-                if token == "FrameTransformMatrix":
-                    self.skip_until_text("{")
-                    matrix = [
-                        [self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text()],
-                        [self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text()],
-                        [self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text()],
-                        [self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text(), self.get_next_float_text()]
-                    ]
-                    child.transform_matrix = mathutils.Matrix(matrix)
-                    self.skip_until_text("}")
-                elif token == "Mesh":
-                    self.parse_mesh_text(child.mesh)
-                elif token == "Frame":
-                    c = XModelNode()
-                    self.parse_frame_text(c)
-                    node.children.append(c)
-            token = self.get_next_token_text()
-        node.children.append(child)
-    
-    def get_next_token_text(self):
-        start = False
-        ret = ""
-        while self.text_pos < len(self.text_content):
-            # comment
-            if len(self.text_content) + 1 < self.text_pos and self.text_content[self.text_pos] == '/' and self.text_content[len(self.text_content) + 1] == '/' or \
-                    self.text_content[self.text_pos] == '#':
-                while self.text_pos < len(self.text_content):
-                    if self.text_content[self.text_pos] == '\n' or self.text_content[self.text_pos] == '\r':
                         break
-                    self.text_pos += 1
-            if self.is_ascii(self.text_content[self.text_pos]):
-                start = True
-                c = self.text_content[self.text_pos]
-                if c == "{" or c == "}" or c == "[" or c == "]" or  c == ";" or c == "," or c == '"':
-                    if len(ret) == 0:
-                        if c == "{":
-                            self.text_brace_count += 1
-                        elif c == "}":
-                            self.text_brace_count -= 1
-                        ret += c
-                        self.text_pos += 1
-                    return ret
-                ret += c
-            elif start:
-                break
+                if item is None:
+                    self.finish_background(context)
+                    self.report({'INFO'}, bpy.app.translations.pgettext("Imported %d X files (%d errors)") % (self.files_done - self.errors, self.errors))
+                    return {'FINISHED'}
+                path, root_node, error = item
+                if error is not None:
+                    self.files_done += 1
+                    self.errors += 1
+                    self.report({'WARNING'}, f"{path}: {get_error_message(error)}")
+                    continue
+                self.nodes_done = 0
+                self.nodes_total = sum(1 for _ in x_parser.iterate_nodes(root_node))
+                self.steps = self.importer.import_node_steps(root_node, path)
+            try:
+                next(self.steps)
+                self.nodes_done += 1
+            except StopIteration:
+                self.steps = None
+                self.files_done += 1
+
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+
+    # 解析と作成の進捗を表示する / Show the progress of parsing and creating
+    def update_progress(self, context):
+        progress = self.progress
+        bytes_consumed = progress.get_bytes_consumed()
+        parsed = bytes_consumed / progress.bytes_total if progress.bytes_total > 0 else 0.0
+        built = self.files_done
+        if self.steps is not None and self.nodes_total > 0:
+            built += self.nodes_done / self.nodes_total
+        built /= len(self.paths)
+        context.window_manager.progress_update(int((parsed + built) / 2 * PROGRESS_STEPS))
+        context.workspace.status_text_set(bpy.app.translations.pgettext("%d / %d files, %.1f / %.1f MB parsed, %d / %d blocks, %d meshes built") % (
+            self.files_done,
+            len(self.paths),
+            bytes_consumed / (1024 * 1024),
+            progress.bytes_total / (1024 * 1024),
+            progress.blocks_done,
+            progress.blocks_total,
+            self.importer.meshes_created,
+        ))
+
+    def finish_background(self, context):
+        if self.steps is not None:
+            # 作成途中のファイルのオブジェクトもシーンに追加する / Add the objects of the file being created to the scene as well
+            self.steps.close()
+            self.steps = None
+            if len(self.importer.objects) > 0:
+                self.importer.link_objects()
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        bpy.context.view_layer.update()
+        report_validation(self, self.importer.validation)
+
+
+# アーカイブ内のXファイル / X file in an archive
+class XArchiveMember(bpy.types.PropertyGroup):
+    selected: BoolProperty(
+        name="Import",
+        default=True,
+    )
 
-            self.text_pos += 1
-        
-        if len(ret) == 0:
-            return None
-        
-        return ret
+# zipファイル内のXファイルをインポート / Import X files in a zip file
+class ImportDirectXXFileFromZip(bpy.types.Operator, ImportHelper):
+    bl_idname = "import.directx_x_zip_for_bve"
+    bl_description = 'Import X files (.x) from a zip file without extracting it'
+    bl_label = "Import DirectX X Files from Zip"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_options = {'UNDO'}
 
-    def skip_until_text(self, target):
-        token = ""
-        while True:
-            token = self.get_next_token_text()
-            if token == target:
-                break
-    
-    def skip_next_token_text(self, expected):
-        token = self.get_next_token_text()
-        if token != expected:
-            raise Exception(f"Unexpected token: {token}")
-        
-    def get_next_int_text(self):
-        token = self.get_next_token_text()
-        while token == ";" or token == ",":
-            token = self.get_next_token_text()
-        
-        if token == None:
-            raise Exception("Unexpected end of file")
-        
-        return int(token)
-        
-    def get_next_float_text(self):
-        token = self.get_next_token_text()
-        while token == ";" or token == ",":
-            token = self.get_next_token_text()
-        
-        if token == None:
-            raise Exception("Unexpected end of file")
-        
-        return float(token)
-
-    def get_next_string_text(self):
-        self.skip_until_text('"')
-        ret = ""
-        while self.text_pos < len(self.text_content):
-            if self.text_content[self.text_pos] == '\\':
-                self.text_pos += 1
-            elif self.text_content[self.text_pos] == '"':
-                self.text_pos += 1
-                break
-            else:
-                ret += self.text_content[self.text_pos]
-            self.text_pos += 1
-        if len(ret) == 0:
-            return None
-        return ret
+    filepath: StringProperty(
+        name="input file",
+        subtype='FILE_PATH'
+    )
 
-    def get_object_name_text(self):
-        token = self.get_next_token_text()
-        if token == "{":
-            return None
-        self.skip_next_token_text("{")
-        return token
-
-    def is_ascii(self, c):
-        return ord(c) <= 255 and ord(c) != ord(' ') and ord(c) != ord('\r') and ord(c) != ord('\n') and ord(c) != ord('\t')
-
-    def parse_token(self):
-        token = self.byte_buffer.get_short()
-        if token == TOKEN_NAME:
-            length = self.byte_buffer.get_int()
-            self.ret_string = self.byte_buffer.get_length(length).decode()
-        elif token == TOKEN_INTEGER:
-            self.ret_integer = self.byte_buffer.get_int()
-        elif token == TOKEN_STRING:
-            length = self.byte_buffer.get_int()
-            self.ret_string = self.byte_buffer.get_length(length).decode()
-            self.parse_token()
-        elif token == TOKEN_GUID:
-            # GUIDは使用しないため無視する / Ignore GUID as it is not used
-            self.byte_buffer.get_int()
-            self.byte_buffer.get_short()
-            self.byte_buffer.get_short()
-            self.byte_buffer.get_length(8)
-        elif token == TOKEN_INTEGER_LIST:
-            length = self.byte_buffer.get_int()
-            self.ret_integer_list = [0] * length
-            for i in range(length):
-                self.ret_integer_list[i] = self.byte_buffer.get_int()
-        elif token == TOKEN_FLOAT_LIST:
-            length = self.byte_buffer.get_int()
-            self.ret_float_list = [0.0] * length
-            if self.float_size == 64:
-                for i in range(length):
-                    self.ret_float_list[i] = self.byte_buffer.get_double()
-            else:
-                for i in range(length):
-                    self.ret_float_list[i] = self.byte_buffer.get_float()
-        elif token == TOKEN_TEMPLATE:
-            # テンプレートは使用する必要がないため無視する / Ignore templates as they are not needed
-            self.parse_token_loop(TOKEN_CBRACE)
-        elif token == TOKEN_OBRACE:
-            self.bin_brace_count += 1
-        elif token == TOKEN_CBRACE:
-            self.bin_brace_count -= 1
-        return token
-
-    def parse_token_loop(self, token):
-        while self.parse_token() != token:
-            pass
+    filename_ext = ".zip"
 
-    def parse_bin(self) -> XModelNode:
-        root_node = XModelNode()
-        while self.byte_buffer.has_remaining():
-            token = self.parse_token()
-            if token == TOKEN_NAME:
-                if self.ret_string == "Mesh":
-                    self.parse_mesh_bin(root_node.mesh)
-                elif self.ret_string == "Material":
-                    self.parse_material_bin(root_node.mesh)
-                elif self.ret_string == "Frame":
-                    self.parse_frame_bin(root_node)
-        return root_node
-
-    def parse_mesh_bin(self, mesh: XModelMesh):
-        self.parse_token_loop(TOKEN_INTEGER_LIST)
-        self.parse_token_loop(TOKEN_FLOAT_LIST)
-        mesh.vertices = []
-        i = 0
-        vertex_index = 0
-        while vertex_index < self.ret_integer_list[0]:
-            vertex = self.ret_float_list[i:i + 3]
-            mesh.vertices.append(vertex)
-            vertex_index += 1
-            i += 3
-        self.parse_token_loop(TOKEN_INTEGER_LIST)
-        mesh.faces = []
-        i = 1
-        while i < len(self.ret_integer_list):
-            length = self.ret_integer_list[i]
-            indexes = self.ret_integer_list[i + 1:i + 1 + length]
-            mesh.faces.append(indexes)
-            i += length + 1
-        
-        brace_count = self.bin_brace_count
-        token = self.parse_token()
-        while brace_count <= self.bin_brace_count:
-            if brace_count == self.bin_brace_count and token == TOKEN_NAME:
-                if self.ret_string == "MeshTextureCoords":
-                    self.parse_mesh_texture_coords_bin(mesh)
-                elif self.ret_string == "MeshMaterialList":
-                    self.parse_mesh_material_list_bin(mesh)
-            token = self.parse_token()
-
-    def parse_mesh_texture_coords_bin(self, mesh: XModelMesh):
-        self.parse_token_loop(TOKEN_INTEGER_LIST)
-        self.parse_token_loop(TOKEN_FLOAT_LIST)
-        i = 0
-        while i < len(self.ret_float_list):
-            vertex = [self.ret_float_list[i], self.ret_float_list[i + 1]]
-            mesh.tex_coords.append(vertex)
-            i += 2
-
-    def parse_mesh_material_list_bin(self, mesh: XModelMesh):
-        self.parse_token_loop(TOKEN_INTEGER_LIST)
-        mesh.material_count = self.ret_integer_list[0]
-        mesh.material_face_indexes = self.ret_integer_list[2:self.ret_integer_list[1] + 2]
-        pos = self.byte_buffer.pos
-        while True:
-            token = self.parse_token()
-            if token == TOKEN_NAME and self.ret_string == "Material":
-                self.parse_material_bin(mesh)
-            else:
-                self.byte_buffer.pos = pos
-                break
-            pos = self.byte_buffer.pos
-
-    def parse_material_bin(self, mesh: XModelMesh):
-        token = self.parse_token()
-        material_name = ""
-        if token == TOKEN_NAME:
-            material_name = self.ret_string
-        self.parse_token_loop(TOKEN_FLOAT_LIST)
-        material = XMaterial()
-        material.name = material_name
-        material.face_color = (self.ret_float_list[0], self.ret_float_list[1], self.ret_float_list[2], self.ret_float_list[3])
-        material.power = self.ret_float_list[4]
-        material.specular_color = (self.ret_float_list[5], self.ret_float_list[6], self.ret_float_list[7])
-        material.emission_color = (self.ret_float_list[8], self.ret_float_list[9], self.ret_float_list[10])
-        token = self.parse_token()
-        if token == TOKEN_NAME and self.ret_string == "TextureFilename":
-            self.parse_token_loop(TOKEN_STRING)
-            material.texture_path = self.ret_string
-            self.parse_token_loop(TOKEN_CBRACE)
-        if token != TOKEN_CBRACE:
-            self.parse_token_loop(TOKEN_CBRACE)
-        mesh.materials.append(material)
-    
-    def parse_frame_bin(self, node: XModelNode):
-        child = XModelNode()
-        token = self.parse_token()
-        name = ""
-        if token == TOKEN_NAME:
-            name = self.ret_string
-        child.node_name = name
-        brace_count = self.bin_brace_count
-        token = self.parse_token()
-        while brace_count<= self.bin_brace_count:
-            if brace_count == self.bin_brace_count and token == TOKEN_NAME:
-                if self.ret_string == "FrameTransformMatrix":
-                    matrix = [
-                        self.ret_float_list[0:4],
-                        self.ret_float_list[4:8],
-                        self.ret_float_list[8:12],
-                        self.ret_float_list[12:16]
-                    ]
-                    child.transform_matrix = mathutils.Matrix(matrix)
-                elif self.ret_string == "Mesh":
-                    self.parse_mesh_bin(child.mesh)
-                elif self.ret_string == "Frame":
-                    c = XModelNode()
-                    self.parse_frame_bin(c)
-                    child.children.append(c)
-        node.children.append(child)
+    filter_glob: StringProperty(
+        default="*.zip",
+        options={'HIDDEN'},
+    )
+
+    members: CollectionProperty(
+        type=XArchiveMember,
+    )
+
+    # members を作成したzipファイル / Zip file that members were listed from
+    listed_filepath: StringProperty(
+        options={'HIDDEN'},
+    )
+
+    remove_all: BoolProperty(
+        name="Remove All Objects and Materials",
+        default=True,
+    )
+    remove_imported_only: BoolProperty(
+        name="Only remove data created by this add-on",
+        default=False,
+    )
+
+    scale: FloatProperty(
+        name="Scale",
+        default=1.0
+    )
+
+    gamma_correction: BoolProperty(
+        name="Gamma correction",
+        default=True,
+    )
+
+    parallel_parse: BoolProperty(
+        name="Parallel parsing",
+        default=False,
+    )
+    share_materials: BoolProperty(
+        name="Reuse materials from previous imports",
+        default=False,
+    )
+    share_meshes: BoolProperty(
+        name="Reuse identical meshes from previous imports",
+        default=False,
+    )
+    split_by_material: BoolProperty(
+        name="Split objects by material",
+        default=True,
+    )
+    validate_meshes: BoolProperty(
+        name="Validate and repair meshes",
+        default=True,
+    )
+
+    # ファイルブラウザーで選択したzipファイル内のXファイルを一覧にする / List the X files in the zip file selected in the file browser
+    def check(self, context):
+        if self.listed_filepath == self.filepath:
+            return False
+        self.listed_filepath = self.filepath
+        self.members.clear()
+        if zipfile.is_zipfile(self.filepath):
+            with x_archive.XArchive(self.filepath) as archive:
+                for name in archive.list_x_files():
+                    self.members.add().name = name
+        return True
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "remove_all")
+        layout.prop(self, "remove_imported_only")
+        layout.prop(self, "scale")
+        layout.prop(self, "gamma_correction")
+        layout.prop(self, "parallel_parse")
+        layout.prop(self, "share_materials")
+        layout.prop(self, "share_meshes")
+        layout.prop(self, "split_by_material")
+        layout.prop(self, "validate_meshes")
+        box = layout.box()
+        for member in self.members:
+            box.prop(member, "selected", text=member.name)
 
     def execute(self, context):
-        # すべてのオブジェクトとマテリアルを削除 / Delete all objects and materials
+        self.check(context)
         if self.remove_all:
-            for obj in bpy.context.scene.objects:
-                if obj.type == 'MESH':
-                    bpy.data.objects.remove(obj)
-            for material in bpy.data.materials:
-                material.user_clear()
-                bpy.data.materials.remove(material)
-
-        self.initialize()
-        # xファイルを読み込み / Load x file
-        with open(self.filepath, "rb") as f:
-            header = f.read(16)
-            if header[0:4] == b'xof ':
-                # フォーマットのチェック
-                self.is_compressed = False
-                if header[8:12] == b'txt ':
-                    self.is_binary = False
-                elif header[8:12] == b'bin ':
-                    self.is_binary = True
-                elif header[8:12] == b'bzip':
-                    self.is_binary = True
-                    self.is_compressed = True
-                self.float_size = int(header[12:16].decode())
-            else:
-                raise Exception(bpy.app.translations.pgettext("This file is not X file!"))
-
-        if self.is_binary:
-            # バイナリ / Binary
-
-            # flate圧縮 / Flate compression
-            if self.is_compressed:
-                with open(self.filepath, "rb") as f:
-                    f.read(16)
-                    raw_data = f.read()
-                    compressed_byte_buffer = utility.ByteBuffer(raw_data)
-                    MSZIP_BLOCK = 0x8000
-                    MSZIP_MAGIC = int.from_bytes("CK".encode(), byteorder='little')
-
-                    unzipped_size = compressed_byte_buffer.get_int()
-
-                    self.byte_buffer = utility.ByteBuffer(bytes())
-                    while compressed_byte_buffer.has_remaining():
-                        uncompressed_size = compressed_byte_buffer.get_short()
-                        block_size = compressed_byte_buffer.get_short()
-                        magic = compressed_byte_buffer.get_short()
-                        if block_size > MSZIP_BLOCK:
-                            raise Exception(bpy.app.translations.pgettext("Unexpected compressed block size!"))
-                        if magic != MSZIP_MAGIC:
-                            raise Exception(bpy.app.translations.pgettext("Unexpected compressed block magic!"))
-                        compressed_data = compressed_byte_buffer.get_length(block_size - 2)
-                        self.byte_buffer.append(zlib.decompress(compressed_data, -8, MSZIP_BLOCK))
-            else:
-                with open(self.filepath, "rb") as f:
-                    f.read(16)
-                    data = f.read()
-                    self.byte_buffer = utility.ByteBuffer(data)
-            root_node = self.parse_bin()
-        else:
-            # テキスト / Text
-            with open(self.filepath) as f:
-                x_model_file_string = f.read()
-                self.text_content = x_model_file_string
-
-                root_node = XModelNode()
-
-                token = self.get_next_token_text()
-                while token != None:
-                    if self.text_brace_count == 0:
-                        if token == "template":
-                            self.get_next_token_text()
-                        elif token == "Mesh":
-                            self.parse_mesh_text(root_node.mesh)
-                        elif token == "Material":
-                            self.parse_material_text(root_node.mesh)
-                        elif token == "Frame":
-                            self.parse_frame_text(root_node)
-                    token = self.get_next_token_text()
-
-        self.create_obj_from_node(mathutils.Matrix.Identity(4), root_node)
+            remove_all_objects_and_materials(self.remove_imported_only)
+
+        importer = XImporter(self.scale, self.gamma_correction, get_material_cache(self.share_materials), self.split_by_material, get_mesh_index(self.share_meshes), self.validate_meshes)
+        with x_archive.XArchive(self.filepath) as archive:
+            for member in self.members:
+                if member.selected:
+                    importer.import_source(archive.read(member.name), member.name, self.parallel_parse, archive)
+        bpy.context.view_layer.update()
+        report_validation(self, importer.validation)
 
         return {'FINISHED'}
 
+# フォルダー内のXファイルの一覧を作成 / Catalog the X files in a directory
+class CatalogDirectXXFiles(bpy.types.Operator):
+    bl_idname = "import.directx_x_catalog_for_bve"
+    bl_description = 'Write an index of the X files (.x) in a directory without importing them'
+    bl_label = "Catalog DirectX X Files"
+    bl_options = {'REGISTER'}
+
+    directory: StringProperty(
+        name="directory",
+        subtype='DIR_PATH'
+    )
+
+    index_file_name: StringProperty(
+        name="Index file name",
+        default=x_catalog.CATALOG_FILE_NAME,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        entries = x_catalog.build_catalog(self.directory, os.path.join(self.directory, self.index_file_name))
+        errors = sum(1 for entry in entries if entry["error"] is not None)
+        self.report({'INFO'}, bpy.app.translations.pgettext("Cataloged %d X files (%d errors)") % (len(entries), errors))
+        return {'FINISHED'}
+
 # Xファイルに出力 / Export to X file
 class ExportDirectXXFile(bpy.types.Operator, ExportHelper):
     bl_idname = "export.directx_x_for_bve"
@@ -895,6 +1207,18 @@ class ExportDirectXXFile(bpy.types.Operator, ExportHelper):
         name="Output mode"
     )
 
+    compression_level: IntProperty(
+        name="Compression level",
+        default=9,
+        min=0,
+        max=9,
+    )
+
+    compression_history: BoolProperty(
+        name="Use compression history",
+        default=False,
+    )
+
     export_material_name: BoolProperty(
         name="Export material name",
         default=True,
@@ -1165,16 +1489,7 @@ class ExportDirectXXFile(bpy.types.Operator, ExportHelper):
                 write_shorts(target, [TOKEN_CBRACE, TOKEN_CBRACE])
                 # flate圧縮 / Flate compression
                 if self.mode == "binary_zip" and uncompressed_buffer is not None:
-                    f.write(struct.pack("<I", uncompressed_buffer.length() + 16))
-                    uncompressed_buffer.pos = 0
-                    MSZIP_BLOCK = 0x8000
-                    while uncompressed_buffer.has_remaining():
-                        length = min(uncompressed_buffer.remaining(), MSZIP_BLOCK)
-                        compressed_data = zlib.compress(uncompressed_buffer.get_length(length))[2:]
-                        f.write(struct.pack("<H", length))
-                        f.write(struct.pack("<H", len(compressed_data) + 2))
-                        f.write("CK".encode())
-                        f.write(compressed_data)
+                    f.write(mszip.compress(uncompressed_buffer.array, self.compression_level, self.compression_history))
         else:
             x_file_content = 'xof 0302txt 0032\n'
 
@@ -0,0 +1,111 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+MSZIP_BLOCK = 0x8000
+MSZIP_MAGIC = b'CK'
+# 圧縮できないデータは無圧縮ブロックとして少し大きくなる / Incompressible data grows slightly as stored blocks
+MSZIP_MAX_COMPRESSED_BLOCK = MSZIP_BLOCK + 12
+# 前のブロックから参照できる範囲 / Window that a block can reference from the previous blocks
+MSZIP_WINDOW = 0x8000
+# この数以上のブロックがあれば並列に展開する / Decompress in parallel when there are at least this many blocks
+PARALLEL_BLOCK_COUNT = 4
+
+
+class MSZipBlock:
+    def __init__(self, output_offset: int, uncompressed_size: int, data):
+        self.output_offset = output_offset
+        self.uncompressed_size = uncompressed_size
+        self.data = data
+
+
+# ブロックのヘッダーを読み込む / Read the headers of all blocks
+# data はXファイルのヘッダー(16バイト)より後ろ / data is everything after the 16-byte X file header
+def read_blocks(data) -> tuple[int, list[MSZipBlock]]:
+    view = memoryview(data).cast('B')
+    unzipped_size = struct.unpack_from("<I", view, 0)[0]
+    blocks = []
+    pos = 4
+    output_offset = 0
+    while pos < len(view):
+        uncompressed_size, block_size, magic = struct.unpack_from("<HH2s", view, pos)
+        if block_size > MSZIP_MAX_COMPRESSED_BLOCK:
+            raise Exception("Unexpected compressed block size!")
+        if magic != MSZIP_MAGIC:
+            raise Exception("Unexpected compressed block magic!")
+        blocks.append(MSZipBlock(output_offset, uncompressed_size, view[pos + 6:pos + 4 + block_size]))
+        output_offset += uncompressed_size
+        pos += 4 + block_size
+    return unzipped_size, blocks
+
+
+def decompress_block(block: MSZipBlock, output: bytearray, use_history: bool = False):
+    offset = block.output_offset
+    if use_history and offset > 0:
+        # 直前までに展開したデータを辞書として使う / Use the data decompressed so far as the dictionary
+        history = bytes(output[max(0, offset - MSZIP_WINDOW):offset])
+        data = zlib.decompressobj(-15, zdict=history).decompress(block.data, block.uncompressed_size)
+    else:
+        data = zlib.decompress(block.data, -15, block.uncompressed_size)
+    if len(data) != block.uncompressed_size:
+        raise Exception("Unexpected compressed block size!")
+    # 同じ長さのスライスへの代入なので再確保は起こらない / Same-length slice assignment, so no reallocation happens
+    output[offset:offset + block.uncompressed_size] = data
+
+
+# 圧縮されたバイナリ形式のXファイルを展開する / Decompress a compressed binary X file
+# progress はブロックを展開するたびに (展開済みのブロック数, ブロック数) で呼び出す /
+#  progress is called with (blocks decompressed, block count) after each block
+def decompress(data, max_workers: int | None = None, progress=None) -> bytearray:
+    unzipped_size, blocks = read_blocks(data)
+    output_size = sum(block.uncompressed_size for block in blocks)
+    # ヘッダーの展開後サイズにはXファイルのヘッダー16バイトが含まれる /
+    #  The unzipped size in the header includes the 16-byte X file header
+    if unzipped_size - 16 != output_size:
+        raise Exception("Unexpected uncompressed size!")
+    output = bytearray(output_size)
+
+    try:
+        if len(blocks) < PARALLEL_BLOCK_COUNT:
+            for i, block in enumerate(blocks):
+                decompress_block(block, output)
+                if progress is not None:
+                    progress(i + 1, len(blocks))
+        else:
+            # zlibはGILを解放するのでスレッドで並列に展開できる / zlib releases the GIL, so blocks can be decompressed on threads
+            if max_workers is None:
+                max_workers = min(len(blocks), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for i, _ in enumerate(executor.map(lambda block: decompress_block(block, output), blocks)):
+                    if progress is not None:
+                        progress(i + 1, len(blocks))
+    except zlib.error:
+        # 前のブロックを参照しているファイル(DirectXのツールで作成したものなど)は順番に展開する /
+        #  Files whose blocks reference the previous blocks (e.g. written by DirectX tools) are decompressed in order
+        for i, block in enumerate(blocks):
+            decompress_block(block, output, use_history=True)
+            if progress is not None:
+                progress(i + 1, len(blocks))
+    return output
+
+
+# バイナリ形式のXファイルのデータを圧縮する(Xファイルのヘッダー16バイトは含まない) /
+#  Compress the data of a binary X file (without the 16-byte X file header)
+# use_history が True の場合、前のブロックを辞書として参照する / If use_history is True, each block references the previous blocks as its dictionary
+def compress(data, level: int = 9, use_history: bool = False) -> bytes:
+    view = memoryview(data).cast('B')
+    output = bytearray(struct.pack("<I", len(view) + 16))
+    pos = 0
+    while pos < len(view):
+        length = min(len(view) - pos, MSZIP_BLOCK)
+        if use_history and pos > 0:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=view[max(0, pos - MSZIP_WINDOW):pos])
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed_data = compressor.compress(view[pos:pos + length]) + compressor.flush()
+        output += struct.pack("<HH", length, len(compressed_data) + 2)
+        output += MSZIP_MAGIC
+        output += compressed_data
+        pos += length
+    return bytes(output)
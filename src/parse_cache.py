@@ -0,0 +1,241 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+try:
+    from . import x_parser
+    from .utility import ByteBuffer, ByteReader
+    from .x_parser import XMaterial, XModelMesh, XModelNode
+except ImportError:
+    import x_parser
+    from utility import ByteBuffer, ByteReader
+    from x_parser import XMaterial, XModelMesh, XModelNode
+
+CACHE_MAGIC = b'XPC\x01'
+CACHE_EXTENSION = ".xpc"
+# 書き込み途中のファイルの拡張子 / Extension of files being written
+TEMPORARY_EXTENSION = ".tmp"
+# 型付き配列の型 / Typecodes of the typed arrays
+ARRAY_TYPECODES = "fdI"
+
+
+def write_string(buffer: ByteBuffer, string: str | None):
+    if string is None:
+        buffer.write(struct.pack("<i", -1))
+        return
+    data = string.encode("utf-8")
+    buffer.write(struct.pack("<i", len(data)))
+    buffer.write(data)
+
+
+def read_string(reader: ByteReader) -> str | None:
+    length = struct.unpack("<i", reader.get_length(4))[0]
+    if length < 0:
+        return None
+    return reader.get_string(length)
+
+
+def write_array(buffer: ByteBuffer, values: array):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    buffer.write(struct.pack("<BQ", ARRAY_TYPECODES.index(values.typecode), len(values)))
+    buffer.write(values.tobytes())
+
+
+def read_array(reader: ByteReader) -> array:
+    typecode = ARRAY_TYPECODES[reader.get_next()]
+    count = struct.unpack("<Q", reader.get_length(8))[0]
+    return reader.get_array(typecode, count)
+
+
+def write_doubles(buffer: ByteBuffer, values):
+    buffer.write(struct.pack(f"<{len(values)}d", *values))
+
+
+def read_doubles(reader: ByteReader, count: int) -> tuple:
+    return struct.unpack(f"<{count}d", reader.get_length(count * 8))
+
+
+def write_material(buffer: ByteBuffer, material: XMaterial):
+    write_string(buffer, material.name)
+    write_doubles(buffer, material.face_color)
+    write_doubles(buffer, (material.power,))
+    write_doubles(buffer, material.specular_color)
+    write_doubles(buffer, material.emission_color)
+    write_string(buffer, material.texture_path)
+
+
+def read_material(reader: ByteReader) -> XMaterial:
+    material = XMaterial()
+    material.name = read_string(reader)
+    material.face_color = read_doubles(reader, 4)
+    material.power = read_doubles(reader, 1)[0]
+    material.specular_color = read_doubles(reader, 3)
+    material.emission_color = read_doubles(reader, 3)
+    material.texture_path = read_string(reader)
+    return material
+
+
+def write_mesh(buffer: ByteBuffer, mesh: XModelMesh):
+    write_string(buffer, mesh.name)
+    write_array(buffer, mesh.vertices)
+    write_array(buffer, mesh.face_indices)
+    write_array(buffer, mesh.face_offsets)
+    write_array(buffer, mesh.tex_coords)
+    write_array(buffer, mesh.normals)
+    write_array(buffer, mesh.material_face_indexes)
+    buffer.write(struct.pack("<II", mesh.material_count, len(mesh.materials)))
+    for material in mesh.materials:
+        write_material(buffer, material)
+
+
+def read_mesh(reader: ByteReader) -> XModelMesh:
+    mesh = XModelMesh()
+    mesh.name = read_string(reader)
+    mesh.vertices = read_array(reader)
+    mesh.face_indices = read_array(reader)
+    mesh.face_offsets = read_array(reader)
+    mesh.tex_coords = read_array(reader)
+    mesh.normals = read_array(reader)
+    mesh.material_face_indexes = read_array(reader)
+    mesh.material_count = reader.get_int()
+    mesh.materials = [read_material(reader) for i in range(reader.get_int())]
+    return mesh
+
+
+# 共有されたメッシュは一度だけ書き込み、2回目以降は番号で参照する /
+#  Shared meshes are written once and referred to by number afterwards
+# meshes はメッシュのid -> 番号 / meshes is mesh id -> number
+def write_node(buffer: ByteBuffer, node: XModelNode, meshes: dict):
+    write_string(buffer, node.node_name)
+    for row in node.transform_matrix:
+        write_doubles(buffer, row)
+    buffer.write(struct.pack("<B", node.is_frame))
+    write_string(buffer, node.mesh_reference)
+    mesh_number = meshes.get(id(node.mesh))
+    if mesh_number is None:
+        mesh_number = meshes[id(node.mesh)] = len(meshes)
+        buffer.write(struct.pack("<I", mesh_number))
+        write_mesh(buffer, node.mesh)
+    else:
+        buffer.write(struct.pack("<I", mesh_number))
+    buffer.write(struct.pack("<I", len(node.children)))
+    for child in node.children:
+        write_node(buffer, child, meshes)
+
+
+# meshes は読み込み済みのメッシュ / meshes are the meshes read so far
+def read_node(reader: ByteReader, meshes: list) -> XModelNode:
+    node = XModelNode()
+    node.node_name = read_string(reader)
+    node.transform_matrix = [list(read_doubles(reader, 4)) for i in range(4)]
+    node.is_frame = reader.get_next() != 0
+    node.mesh_reference = read_string(reader)
+    mesh_number = reader.get_int()
+    if mesh_number == len(meshes):
+        meshes.append(read_mesh(reader))
+    node.mesh = meshes[mesh_number]
+    node.children = [read_node(reader, meshes) for i in range(reader.get_int())]
+    return node
+
+
+# 解析結果をバイト列に変換する / Serialize a parsed model to bytes
+def serialize(node: XModelNode) -> bytes:
+    buffer = ByteBuffer(CACHE_MAGIC)
+    buffer.write(struct.pack("<I", x_parser.PARSER_VERSION))
+    write_node(buffer, node, {})
+    return bytes(buffer.array)
+
+
+# バイト列から解析結果を復元する / Restore a parsed model from bytes
+# 形式やパーサーのバージョンが違う場合はNoneを返す / Returns None if the format or the parser version differs
+def deserialize(data) -> XModelNode | None:
+    reader = ByteReader(data)
+    try:
+        if bytes(reader.get_length(4)) != CACHE_MAGIC or reader.get_int() != x_parser.PARSER_VERSION:
+            return None
+        return read_node(reader, [])
+    finally:
+        reader.release()
+
+
+# 解析結果をディスクに保存するキャッシュ / Cache that stores parsed models on disk
+# ファイルの更新日時を最終使用日時として使い、容量を超えたら古いものから削除する(LRU) /
+#  The modification time of each cache file is its last use, and the least recently used files are removed when the size cap is exceeded
+class ParseCache:
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+
+    # パス、ファイルサイズ、更新日時、パーサーのバージョンからキャッシュのファイル名を決める /
+    #  Derive the cache file name from the path, file size, modification time and parser version
+    def get_cache_path(self, path: str) -> str:
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{x_parser.PARSER_VERSION}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + CACHE_EXTENSION)
+
+    def get(self, path: str) -> XModelNode | None:
+        cache_path = self.get_cache_path(path)
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            node = deserialize(data)
+        except Exception:
+            # 壊れたキャッシュは使わない / Do not use broken cache files
+            node = None
+        if node is None:
+            self.remove(cache_path)
+            return None
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return node
+
+    def put(self, path: str, node: XModelNode):
+        cache_path = self.get_cache_path(path)
+        data = serialize(node)
+        if len(data) > self.max_size:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # 書き込み途中のファイルを読まないように、別名で書き込んでから置き換える /
+        #  Write to another name first and then replace, so that a partially written file is never read
+        temporary_path = cache_path + TEMPORARY_EXTENSION
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, cache_path)
+        self.evict()
+
+    # 容量を超えた分を最後に使われたのが古いものから削除する / Remove the least recently used files beyond the size cap
+    def evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_EXTENSION):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_size += stat.st_size
+        entries.sort()
+        for mtime, size, cache_path in entries:
+            if total_size <= self.max_size:
+                break
+            self.remove(cache_path)
+            total_size -= size
+
+    def remove(self, cache_path: str):
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
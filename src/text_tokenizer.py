@@ -0,0 +1,234 @@
+import codecs
+import locale
+import re
+from array import array
+
+# 空白とコメント(// または #)を読み飛ばし、次のトークンを取得する /
+#  Skip whitespace and comments (// or #), then capture the next token
+# group(1): 記号 / symbol, group(2): 単語 / word
+TOKEN_PATTERN = re.compile(rb'(?:\s|//[^\r\n]*|#[^\r\n]*)*(?:([{}\[\];,"])|((?:[^\s{}\[\];,"#/]|/(?!/))+))')
+# 文字列の中身(終端の"まで) / String body (up to the closing ")
+STRING_BODY_PATTERN = re.compile(rb'((?:[^"\\]|\\.)*)"', re.DOTALL)
+ESCAPE_PATTERN = re.compile(rb'\\(.)', re.DOTALL)
+# 数値の並び(区切り記号とコメントを含む) / Run of numbers (including separators and comments)
+NUMBER_RUN_PATTERN = re.compile(rb'(?:[\s;,]|//[^\r\n]*|#[^\r\n]*|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)*+')
+COMMENT_PATTERN = re.compile(rb'//[^\r\n]*|#[^\r\n]*')
+# 括弧の対応表の作成用(文字列とコメントの中の括弧は無視する) / For building the brace table (braces in strings and comments are ignored)
+BRACE_PATTERN = re.compile(rb'[^{}"/#]*+(?:([{}])|"(?:[^"\\]|\\.)*"|//[^\r\n]*|#[^\r\n]*|/)', re.DOTALL)
+# 多バイト文字の中に0x80未満のバイトが現れないエンコーディング(バイト列のまま字句解析できる) /
+#  Encodings whose multibyte characters never contain bytes below 0x80 (they can be tokenized as bytes)
+# Shift_JIS(cp932)などは2バイト目が [ \ { } になることがあるため、先に全体を文字列に変換する /
+#  Shift_JIS (cp932) and such can have [ \ { } as the second byte, so the whole content is decoded first
+ASCII_COMPATIBLE_ENCODINGS = frozenset(("ascii", "utf-8", "iso8859-1", "cp1252", "euc_jp"))
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    return codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS
+
+
+# バイト列用または文字列用の正規表現と記号 / Regular expressions and symbols for bytes or for str
+class TokenSyntax:
+
+    def __init__(self, kind: type):
+        if kind is bytes:
+            convert_pattern = lambda pattern: pattern
+            convert_symbol = lambda symbol: symbol
+        else:
+            convert_pattern = lambda pattern: re.compile(pattern.pattern.decode("ascii"), pattern.flags | re.ASCII)
+            convert_symbol = lambda symbol: symbol.decode("ascii")
+        self.token = convert_pattern(TOKEN_PATTERN)
+        self.string_body = convert_pattern(STRING_BODY_PATTERN)
+        self.escape = convert_pattern(ESCAPE_PATTERN)
+        self.number_run = convert_pattern(NUMBER_RUN_PATTERN)
+        self.comment = convert_pattern(COMMENT_PATTERN)
+        self.brace = convert_pattern(BRACE_PATTERN)
+        self.open_brace = convert_symbol(b"{")
+        self.close_brace = convert_symbol(b"}")
+        self.slash = convert_symbol(b"/")
+        self.hash = convert_symbol(b"#")
+        self.semicolon = convert_symbol(b";")
+        self.comma = convert_symbol(b",")
+        self.space = convert_symbol(b" ")
+        self.escaped = convert_symbol(rb"\1")
+
+
+BYTES_SYNTAX = TokenSyntax(bytes)
+STR_SYNTAX = TokenSyntax(str)
+
+
+# テキスト形式のXファイル用トークナイザ / Tokenizer for text X files
+# content はバイト列(bytes, bytearray, mmapなど)または文字列 / content is a bytes-like object (bytes, bytearray, mmap...) or a str
+# ASCII互換のエンコーディングではバイト列のまま字句解析し、トークンは読み込む時に文字列に変換する /
+#  With ASCII-compatible encodings the bytes are tokenized as they are, and tokens are decoded when they are read
+# それ以外のエンコーディングでは先に全体を文字列に変換する / With other encodings the whole content is decoded first
+class TextTokenizer:
+
+    def __init__(self, content, encoding: str | None = None):
+        self.encoding = encoding if encoding is not None else locale.getpreferredencoding(False)
+        if not isinstance(content, str) and not is_ascii_compatible(self.encoding):
+            content = str(content, self.encoding, 'replace')
+        self.content = content
+        self.syntax = STR_SYNTAX if isinstance(content, str) else BYTES_SYNTAX
+        self.pos = 0
+        self.brace_count = 0
+        # 開いている括弧の位置 / Positions of the open braces
+        self.open_braces = []
+        # 開き括弧の位置 -> 閉じ括弧の位置 / Position of an opening brace -> position of its closing brace
+        self.brace_table = None
+        # 読み込み済みの数値の並び / Numbers of the run read in bulk
+        self.numbers = []
+        self.number_index = 0
+
+    # 次のトークンの位置を取得 / Get the span of the next token
+    def get_next_span(self):
+        # 読み残した数値は読み飛ばす / Skip the rest of the number run
+        self.numbers = []
+        self.number_index = 0
+        syntax = self.syntax
+        match = syntax.token.match(self.content, self.pos)
+        if match is None:
+            self.pos = len(self.content)
+            return None
+        symbol = match.group(1)
+        if symbol == syntax.open_brace:
+            self.brace_count += 1
+            self.open_braces.append(match.start(1))
+        elif symbol == syntax.close_brace:
+            self.brace_count -= 1
+            if len(self.open_braces) > 0:
+                self.open_braces.pop()
+        self.pos = match.end()
+        return match.start(1) if symbol else match.start(2), self.pos
+
+    def get_next_token(self):
+        span = self.get_next_span()
+        if span is None:
+            return None
+        return self.decode(self.content[span[0]:span[1]])
+
+    def decode(self, data):
+        if isinstance(data, str):
+            return data
+        return str(data, self.encoding, 'replace')
+
+    def get_brace_table(self):
+        if self.brace_table is None:
+            self.brace_table = {}
+            starts = []
+            for match in self.syntax.brace.finditer(self.content):
+                symbol = match.group(1)
+                if symbol == self.syntax.open_brace:
+                    starts.append(match.start(1))
+                elif symbol == self.syntax.close_brace and len(starts) > 0:
+                    self.brace_table[starts.pop()] = match.start(1)
+        return self.brace_table
+
+    # 読み込み中のブロックの残りを閉じ括弧まで読み飛ばす / Skip the rest of the current block up to its closing brace
+    def skip_block(self):
+        self.numbers = []
+        self.number_index = 0
+        if len(self.open_braces) == 0:
+            self.skip_until("}")
+            return
+        end = self.get_brace_table().get(self.open_braces.pop())
+        self.pos = len(self.content) if end is None else end + 1
+        self.brace_count -= 1
+
+    def skip_until(self, target):
+        while True:
+            token = self.get_next_token()
+            if token == target:
+                break
+            if token is None:
+                raise Exception("Unexpected end of file")
+
+    def skip_next_token(self, expected):
+        token = self.get_next_token()
+        if token != expected:
+            raise Exception(f"Unexpected token: {token}")
+
+    # 次の数値の並びをまとめて読み込む / Read the next run of numbers in bulk
+    def read_numbers(self):
+        if self.number_index < len(self.numbers):
+            return
+        syntax = self.syntax
+        end = syntax.number_run.match(self.content, self.pos).end()
+        region = self.content[self.pos:end]
+        if syntax.slash in region or syntax.hash in region:
+            region = syntax.comment.sub(syntax.space, region)
+        self.numbers = region.replace(syntax.semicolon, syntax.space).replace(syntax.comma, syntax.space).split()
+        self.number_index = 0
+        self.pos = end
+        if len(self.numbers) == 0:
+            token = self.get_next_token()
+            if token == None:
+                raise Exception("Unexpected end of file")
+            raise Exception(f"Unexpected token: {token}")
+
+    def take_numbers(self, count):
+        if count == 0:
+            return []
+        self.read_numbers()
+        start = self.number_index
+        if start + count > len(self.numbers):
+            raise Exception("Unexpected end of number list")
+        self.number_index += count
+        return self.numbers[start:self.number_index]
+
+    def get_next_int(self):
+        self.read_numbers()
+        self.number_index += 1
+        return int(self.numbers[self.number_index - 1])
+
+    def get_next_float(self):
+        self.read_numbers()
+        self.number_index += 1
+        return float(self.numbers[self.number_index - 1])
+
+    def get_int_array(self, count):
+        return array('I', map(int, self.take_numbers(count)))
+
+    def get_float_array(self, count):
+        return array('d', map(float, self.take_numbers(count)))
+
+    # 面の配列を頂点インデックスの配列と各面の開始位置に分けて読み込む /
+    #  Read an array of faces as a flat vertex index array and the start offset of each face
+    def get_face_arrays(self, count):
+        if count == 0:
+            return array('I'), array('I', [0])
+        self.read_numbers()
+        numbers = self.numbers
+        i = self.number_index
+        face_offsets = array('I', [0]) * (count + 1)
+        face_indices = array('I')
+        offset = 0
+        for face in range(count):
+            if i >= len(numbers):
+                raise Exception("Unexpected end of number list")
+            size = int(numbers[i])
+            face_indices.extend(map(int, numbers[i + 1:i + 1 + size]))
+            offset += size
+            face_offsets[face + 1] = offset
+            i += size + 1
+        if len(face_indices) != offset:
+            raise Exception("Unexpected end of number list")
+        self.number_index = i
+        return face_indices, face_offsets
+
+    def get_next_string(self):
+        self.skip_until('"')
+        match = self.syntax.string_body.match(self.content, self.pos)
+        if match is None:
+            raise Exception("Unexpected end of file")
+        self.pos = match.end()
+        ret = self.decode(self.syntax.escape.sub(self.syntax.escaped, match.group(1)))
+        if len(ret) == 0:
+            return None
+        return ret
+
+    def get_object_name(self):
+        token = self.get_next_token()
+        if token == "{":
+            return None
+        self.skip_next_token("{")
+        return token
@@ -1,4 +1,6 @@
 import struct
+import sys
+from array import array
 
 def vertex_to_str(vertex):
     # Blender X Z Y
@@ -75,3 +77,76 @@ class ByteBuffer:
 
     def remaining(self):
         return len(self.array) - self.pos
+
+# memoryviewを使ったコピーしない読み込み用バッファ / Zero-copy read buffer backed by memoryview
+class ByteReader:
+
+    def __init__(self, data):
+        self.view = memoryview(data).cast('B')
+        self.pos = 0
+
+    def get_next(self):
+        value = self.view[self.pos]
+        self.pos += 1
+        return value
+
+    # コピーせずにmemoryviewを返す / Return a memoryview without copying
+    def get_length(self, length):
+        value = self.view[self.pos:self.pos + length]
+        self.pos += length
+        return value
+
+    def get_string(self, length):
+        return str(self.get_length(length), 'utf-8')
+
+    def get_int(self):
+        value = struct.unpack_from("<I", self.view, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def get_short(self):
+        value = struct.unpack_from("<H", self.view, self.pos)[0]
+        self.pos += 2
+        return value
+
+    def get_float(self):
+        value = struct.unpack_from("<f", self.view, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def get_double(self):
+        value = struct.unpack_from("<d", self.view, self.pos)[0]
+        self.pos += 8
+        return value
+
+    # リストをまとめて読み込む / Read a whole list at once
+    def get_array(self, typecode, count):
+        values = array(typecode)
+        data = self.get_length(count * values.itemsize)
+        if len(data) != count * values.itemsize:
+            raise Exception("Unexpected end of file")
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def get_int_list(self, count):
+        return self.get_array('I', count)
+
+    def get_float_list(self, count, float_size=32):
+        return self.get_array('d' if float_size == 64 else 'f', count)
+
+    def has_remaining(self):
+        return len(self.view) > self.pos
+
+    def skip(self, length):
+        self.pos += length
+
+    def length(self):
+        return len(self.view)
+
+    def remaining(self):
+        return len(self.view) - self.pos
+
+    def release(self):
+        self.view.release()
@@ -0,0 +1,39 @@
+import posixpath
+import zipfile
+
+
+# Xファイルとテクスチャを展開せずに読み込むためのzipファイル / Zip file to read X files and textures from without extracting them
+class XArchive:
+
+    def __init__(self, source):
+        self.zip_file = zipfile.ZipFile(source)
+        # Windowsで作られたものが多いため、大文字と小文字を区別せずに探す /
+        #  Many archives are made on Windows, so names are looked up case-insensitively
+        self.names = {}
+        for name in self.zip_file.namelist():
+            if not name.endswith("/"):
+                self.names.setdefault(name.lower(), name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.zip_file.close()
+
+    def list_x_files(self) -> list[str]:
+        return [name for name in self.names.values() if name.lower().endswith(".x")]
+
+    def read(self, name: str) -> bytes:
+        return self.zip_file.read(name)
+
+    # Xファイルに書かれたテクスチャのパスをアーカイブ内の名前に変換する / Convert a texture path written in an X file to a name in the archive
+    # 見つからない場合はNoneを返す / Returns None if it is not found
+    def resolve(self, member: str, texture_path: str) -> str | None:
+        path = texture_path.replace("\\", "/")
+        if not path.startswith("/"):
+            path = posixpath.join(posixpath.dirname(member), path)
+        path = posixpath.normpath(path).lstrip("/")
+        return self.names.get(path.lower())
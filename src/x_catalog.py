@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+
+# ワーカープロセスで読み込めるように、このモジュールもbpyを使わない / This module does not use bpy either, so that worker processes can import it
+try:
+    from . import x_parser
+    from .x_parser import XBinaryParser, XModelMesh, XModelNode, XTextParser
+    from .binary_tokenizer import TOKEN_FLOAT_LIST, TOKEN_INTEGER_LIST
+except ImportError:
+    import x_parser
+    from x_parser import XBinaryParser, XModelMesh, XModelNode, XTextParser
+    from binary_tokenizer import TOKEN_FLOAT_LIST, TOKEN_INTEGER_LIST
+
+# スクリプトとして実行した場合も、ワーカーではこのモジュールを名前で読み込む / Workers import this module by name even when it is run as a script
+MODULE_NAME = os.path.splitext(os.path.basename(__file__))[0]
+CATALOG_VERSION = 1
+CATALOG_FILE_NAME = "xfile_catalog.json"
+# ワーカーごとのタスクのまとまりの数 / Number of task batches per worker
+BATCHES_PER_WORKER = 4
+
+
+# Xファイルのメタデータ / Metadata of an X file
+class XFileInfo:
+    __slots__ = (
+        "path",
+        "file_size",
+        "mtime",
+        "format",
+        "float_size",
+        "mesh_count",
+        "vertex_count",
+        "face_count",
+        "material_count",
+        "frame_count",
+        "textures",
+        "error",
+    )
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.file_size = 0
+        self.mtime = 0.0
+        # "txt", "bin", "bzip"
+        self.format = ""
+        self.float_size = 0
+        self.mesh_count = 0
+        self.vertex_count = 0
+        self.face_count = 0
+        self.material_count = 0
+        self.frame_count = 0
+        self.textures: list[str] = []
+        self.error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# 座標などのデータを数値に変換せずに、数だけを数えるテキスト形式のスキャナー /
+#  Text scanner that only counts the data without converting coordinates and such to numbers
+class XTextScanner(XTextParser):
+
+    def __init__(self, content, info: XFileInfo):
+        super().__init__(content)
+        self.info = info
+
+    def parse_mesh_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        vertex_size = tokenizer.get_next_int()
+        tokenizer.take_numbers(vertex_size * 3)
+        faces_size = tokenizer.get_next_int()
+        self.info.mesh_count += 1
+        self.info.vertex_count += vertex_size
+        self.info.face_count += faces_size
+
+        # 面と MeshTextureCoords などは読み飛ばす / Faces, MeshTextureCoords and such are skipped
+        self.parse_block_text({
+            "MeshMaterialList": lambda: self.parse_mesh_material_list_text(mesh),
+        })
+
+    def parse_mesh_material_list_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        mesh.material_count = tokenizer.get_next_int()
+        face_count = tokenizer.get_next_int()
+        tokenizer.take_numbers(face_count)
+
+        self.parse_block_text({
+            "Material": lambda: self.parse_material_text(mesh),
+        })
+
+    def parse_frame_text(self, node: XModelNode):
+        self.info.frame_count += 1
+        super().parse_frame_text(node)
+
+
+# 座標などのデータを読み込まずに、数だけを数えるバイナリ形式のスキャナー /
+#  Binary scanner that only counts the data without reading coordinates and such
+class XBinaryScanner(XBinaryParser):
+
+    def __init__(self, payload, float_size: int, info: XFileInfo):
+        super().__init__(payload, float_size)
+        self.info = info
+
+    def parse_mesh_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        name, end = self.open_block_bin()
+        vertex_size = index.get_int_list_item(self.find_token_bin(TOKEN_INTEGER_LIST, end), 0)
+        self.find_token_bin(TOKEN_FLOAT_LIST, end)
+        faces_size = index.get_int_list_item(self.find_token_bin(TOKEN_INTEGER_LIST, end), 0)
+        self.info.mesh_count += 1
+        self.info.vertex_count += vertex_size
+        self.info.face_count += faces_size
+
+        self.parse_block_bin(end, {
+            "MeshMaterialList": lambda: self.parse_mesh_material_list_bin(mesh),
+        })
+
+    def parse_mesh_material_list_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        name, end = self.open_block_bin()
+        mesh.material_count = index.get_int_list_item(self.find_token_bin(TOKEN_INTEGER_LIST, end), 0)
+        self.parse_block_bin(end, {
+            "Material": lambda: self.parse_material_bin(mesh),
+        })
+
+    def parse_frame_bin(self, node: XModelNode):
+        self.info.frame_count += 1
+        super().parse_frame_bin(node)
+
+
+# スキャンしたノードからマテリアルとテクスチャを集計する / Collect the materials and textures of the scanned nodes
+def summarize(node: XModelNode, info: XFileInfo):
+    for material in node.mesh.materials:
+        info.material_count += 1
+        if material.texture_path and material.texture_path not in info.textures:
+            info.textures.append(material.texture_path)
+    for child in node.children:
+        summarize(child, info)
+
+
+def scan_data(data, info: XFileInfo) -> XFileInfo:
+    file_format, float_size = x_parser.read_header(data)
+    info.format = file_format.strip()
+    info.float_size = float_size
+    if file_format not in ("bin ", "bzip"):
+        summarize(XTextScanner(data, info).parse(), info)
+        return info
+
+    payload = x_parser.get_binary_payload(data, file_format)
+    scanner = XBinaryScanner(payload, float_size, info)
+    try:
+        summarize(scanner.parse(), info)
+    finally:
+        # mmapを閉じられるように参照を解放する / Release the references so that the mmap can be closed
+        scanner.token_index.reader.release()
+        if isinstance(payload, memoryview):
+            payload.release()
+    return info
+
+
+# オブジェクトを作成せずにXファイルのメタデータを読み込む / Read the metadata of an X file without creating any objects
+# source はファイルのパス、バイト列、またはファイルオブジェクト / source is a file path, a bytes-like object or a file object
+def scan(source) -> XFileInfo:
+    info = XFileInfo()
+    if isinstance(source, (str, os.PathLike)):
+        info.path = os.fspath(source)
+        stat = os.stat(source)
+        info.file_size = stat.st_size
+        info.mtime = stat.st_mtime
+    return x_parser.process_source(source, lambda data: scan_data(data, info))
+
+
+# ワーカープロセスで1つのファイルをスキャンする / Scan one file in a worker process
+# 読み込めないファイルがあってもカタログの作成を続けられるように、エラーは結果に記録する /
+#  Errors are recorded in the result so that the catalog can be built even if some files cannot be read
+def scan_file(path: str) -> dict:
+    try:
+        return scan(path).to_dict()
+    except Exception as e:
+        info = XFileInfo(path)
+        info.error = str(e)
+        return info.to_dict()
+
+
+def find_x_files(directory: str) -> list[str]:
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.lower().endswith(".x"):
+                paths.append(os.path.join(root, file_name))
+    return paths
+
+
+# フォルダー内のXファイルを複数のプロセスでスキャンし、索引ファイルに書き出す /
+#  Scan the X files in a directory tree in multiple processes and write them to an index file
+def build_catalog(directory: str, output_path: str | None = None, max_workers: int | None = None) -> list[dict]:
+    directory = os.path.abspath(directory)
+    if output_path is None:
+        output_path = os.path.join(directory, CATALOG_FILE_NAME)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    paths = find_x_files(directory)
+
+    if len(paths) < 2 or max_workers < 2:
+        entries = [scan_file(path) for path in paths]
+    else:
+        max_workers = min(max_workers, len(paths))
+        chunksize = max(1, len(paths) // (max_workers * BATCHES_PER_WORKER))
+        with x_parser.create_worker_pool(max_workers) as executor:
+            entries = list(executor.map(x_parser.WorkerFunction("scan_file", MODULE_NAME), paths, chunksize=chunksize))
+
+    # 索引ファイルの場所に依存しないように、パスはフォルダーからの相対パスにする /
+    #  Paths are relative to the directory so that the index does not depend on where it is
+    for entry in entries:
+        entry["path"] = os.path.relpath(entry["path"], directory).replace(os.sep, "/")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": CATALOG_VERSION,
+            "root": directory,
+            "files": entries,
+        }, f, ensure_ascii=False, indent=1)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan X files in a directory tree and write an index file")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", help=f"index file (default: <directory>/{CATALOG_FILE_NAME})")
+    parser.add_argument("-j", "--jobs", type=int, help="number of worker processes")
+    args = parser.parse_args()
+    entries = build_catalog(args.directory, args.output, args.jobs)
+    errors = sum(1 for entry in entries if entry["error"] is not None)
+    print(f"{len(entries)} files, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,826 @@
+import importlib
+import io
+import mmap
+import multiprocessing
+import os
+import pickle
+import site
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Self
+
+# 並列解析のワーカープロセスはbpyを読み込めないため、このモジュールは単体で読み込めるようにしておく /
+#  Worker processes of the parallel parser cannot import bpy, so this module must be importable on its own
+try:
+    from . import mszip
+    from .binary_tokenizer import BinaryTokenIndex, TOKEN_NAME, TOKEN_STRING, TOKEN_GUID, TOKEN_INTEGER_LIST, TOKEN_FLOAT_LIST, TOKEN_OBRACE, TOKEN_TEMPLATE
+    from .text_tokenizer import TextTokenizer
+    from .utility import ByteReader
+except ImportError:
+    import mszip
+    from binary_tokenizer import BinaryTokenIndex, TOKEN_NAME, TOKEN_STRING, TOKEN_GUID, TOKEN_INTEGER_LIST, TOKEN_FLOAT_LIST, TOKEN_OBRACE, TOKEN_TEMPLATE
+    from text_tokenizer import TextTokenizer
+    from utility import ByteReader
+
+# 解析結果の形式を変えた時に上げる(解析キャッシュのキー) / Bump when the parsed model changes (key of the parse cache)
+PARSER_VERSION = 4
+IDENTITY_MATRIX = [
+    [1.0, 0.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0, 0.0],
+    [0.0, 0.0, 1.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0],
+]
+# 最上位のデータオブジェクトのうち解析するもの / Top-level data objects that are parsed
+TOP_LEVEL_OBJECTS = ("Mesh", "Material", "Frame")
+# テキスト形式の記号のトークン / Symbol tokens of the text format
+TEXT_SYMBOLS = frozenset(("{", "}", "[", "]", ";", ",", '"'))
+# この大きさ以上のテキスト形式のファイルを並列に解析する / Text files of at least this size are parsed in parallel
+PARALLEL_MIN_SIZE = 1024 * 1024
+# ワーカーごとのチャンク数 / Number of chunks per worker
+CHUNKS_PER_WORKER = 4
+# 複数のファイルを解析する時に、ワーカーごとに先に解析しておくファイルの数 / Number of files parsed ahead per worker when parsing multiple files
+FILES_AHEAD_PER_WORKER = 2
+
+# メッシュのデータ / Mesh data
+# 頂点とUVは型付き配列に平坦に並べ、面は頂点インデックスの配列と各面の開始位置(CSR形式)で持つ /
+#  Vertices and UVs are flat typed arrays, faces are a flat vertex index array plus the start offset of each face (CSR layout)
+class XModelMesh:
+    __slots__ = (
+        "vertices",
+        "face_indices",
+        "face_offsets",
+        "tex_coords",
+        "normals",
+        "materials",
+        "material_face_indexes",
+        "material_count",
+        "name",
+    )
+
+    def __init__(self):
+        # x, y, z, x, y, z, ...
+        self.vertices = array('d')
+        self.face_indices = array('I')
+        # 面iの頂点は face_indices[face_offsets[i]:face_offsets[i + 1]] / The vertices of face i are face_indices[face_offsets[i]:face_offsets[i + 1]]
+        self.face_offsets = array('I', [0])
+        # u, v, u, v, ...
+        self.tex_coords = array('d')
+        self.normals = array('d')
+        self.materials: list[XMaterial] = []
+        self.material_face_indexes = array('I')
+        self.material_count = 0
+        # { 名前 } で参照するためのメッシュの名前 / Name of the mesh used by { name } references
+        self.name: str | None = ""
+
+    def vertex_count(self) -> int:
+        return len(self.vertices) // 3
+
+    def face_count(self) -> int:
+        return len(self.face_offsets) - 1
+
+    def tex_coord_count(self) -> int:
+        return len(self.tex_coords) // 2
+
+    def is_empty(self) -> bool:
+        return len(self.vertices) == 0 and self.face_count() == 0
+
+class XModelNode:
+    __slots__ = ("node_name", "transform_matrix", "mesh", "children", "is_frame", "mesh_reference")
+
+    def __init__(self):
+        self.node_name: str | None = ""
+        self.transform_matrix: list[list[float]] = [row[:] for row in IDENTITY_MATRIX]
+        # 同じメッシュを複数のノードで共有することがある / The same mesh may be shared by several nodes
+        self.mesh = XModelMesh()
+        self.children: list[Self] = []
+        # Frame から作成したノードか / Whether the node was created from a Frame
+        self.is_frame = False
+        # まだ解決していない { 名前 } によるメッシュの参照 / Mesh reference by { name } that is not resolved yet
+        self.mesh_reference: str | None = None
+
+class XMaterial:
+    __slots__ = ("face_color", "power", "specular_color", "emission_color", "texture_path", "name")
+
+    def __init__(self):
+        self.face_color: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0)
+        self.power: float = 0.0
+        self.specular_color: tuple[float, float, float] = (0.0, 0.0, 0.0)
+        self.emission_color: tuple[float, float, float] = (0.0, 0.0, 0.0)
+        self.texture_path: str | None = ""
+        self.name: str | None = ""
+
+
+# 面の数と各面の頂点数、頂点インデックスが並んだ配列をCSR形式に分ける /
+#  Split an array of [vertex count, indices...] per face into the CSR layout
+def split_face_list(values, start: int = 0) -> tuple[array, array]:
+    face_indices = array('I')
+    face_offsets = array('I', [0])
+    i = start
+    while i < len(values):
+        length = values[i]
+        face_indices.extend(values[i + 1:i + 1 + length])
+        face_offsets.append(len(face_indices))
+        i += length + 1
+    return face_indices, face_offsets
+
+# 最上位のメッシュをノードに追加する / Add a top-level mesh to the root node
+# 最初のメッシュはルートノードのメッシュにし、2つ目以降は子ノードにする /
+#  The first mesh becomes the mesh of the root node, the following ones become child nodes
+def add_top_level_mesh(root_node: XModelNode, mesh: XModelMesh, has_root_mesh: bool):
+    if has_root_mesh:
+        child = XModelNode()
+        child.mesh = mesh
+        root_node.children.append(child)
+    else:
+        # メッシュより前に書かれたマテリアルを先頭にする / Materials written before the mesh come first
+        mesh.materials = root_node.mesh.materials + mesh.materials
+        root_node.mesh = mesh
+
+
+# Frame 内のメッシュを入れるノードを取得する / Get the node to hold a mesh in a Frame
+# 2つ目以降のメッシュは子ノードにする / The second and following meshes go to child nodes
+def get_frame_mesh_node(node: XModelNode) -> XModelNode:
+    if node.mesh_reference is None and node.mesh.is_empty():
+        return node
+    child = XModelNode()
+    child.node_name = node.node_name
+    node.children.append(child)
+    return child
+
+
+def iterate_nodes(root_node: XModelNode):
+    nodes = [root_node]
+    while len(nodes) > 0:
+        node = nodes.pop()
+        yield node
+        nodes.extend(reversed(node.children))
+
+
+# { 名前 } による参照を同じ名前のメッシュに置き換え、メッシュを共有する /
+#  Replace { name } references with the mesh of that name, so that the mesh is shared
+# 見つからない参照は後で結合する結果のために残す / References that are not found are kept for results merged later
+def resolve_mesh_references(root_node: XModelNode):
+    meshes = {}
+    for node in iterate_nodes(root_node):
+        if node.mesh_reference is None and node.mesh.name:
+            meshes.setdefault(node.mesh.name, node.mesh)
+    for node in iterate_nodes(root_node):
+        if node.mesh_reference is not None:
+            mesh = meshes.get(node.mesh_reference)
+            if mesh is not None:
+                node.mesh = mesh
+                node.mesh_reference = None
+
+
+# 解析を取り消した / The parse was cancelled
+class ParseCancelled(Exception):
+    pass
+
+
+# 別のスレッドで解析する時の進捗 / Progress of a parse running on another thread
+# 解析するスレッドが書き込み、メインスレッドが読み込む / Written by the parsing thread and read by the main thread
+class ParseProgress:
+
+    def __init__(self, bytes_total: int = 0):
+        self.bytes_total = bytes_total
+        # 解析が終わったファイルのバイト数 / Bytes of the files already parsed
+        self.bytes_done = 0
+        self.file_size = 0
+        # 解析中のファイルのうち読み込んだ割合 / Fraction of the current file consumed
+        self.position = 0.0
+        self.blocks_done = 0
+        self.blocks_total = 0
+        # メインスレッドが True にすると、解析中のスレッドで ParseCancelled を発生させる /
+        #  When the main thread sets this to True, ParseCancelled is raised on the parsing thread
+        self.cancelled = False
+
+    def check(self):
+        if self.cancelled:
+            raise ParseCancelled()
+
+    def start_file(self, file_size: int):
+        self.file_size = file_size
+        self.position = 0.0
+        self.blocks_done = 0
+        self.blocks_total = 0
+
+    def finish_file(self):
+        self.bytes_done += self.file_size
+        self.file_size = 0
+        self.position = 0.0
+
+    def set_position(self, position: float):
+        self.check()
+        self.position = position
+
+    def set_blocks(self, blocks_done: int, blocks_total: int):
+        self.check()
+        self.blocks_done = blocks_done
+        self.blocks_total = blocks_total
+
+    def get_bytes_consumed(self) -> int:
+        return self.bytes_done + int(self.file_size * self.position)
+
+
+# 最上位のデータオブジェクトを読み込むたびに進捗を報告する / Report the progress after each top-level data object
+def report_after(parser, report):
+    def parse_and_report():
+        parser()
+        report()
+    return parse_and_report
+
+
+# テキスト形式のXファイルのパーサー / Parser for text X files
+class XTextParser:
+
+    def __init__(self, content, encoding: str | None = None, has_root_mesh: bool = False, progress: ParseProgress | None = None):
+        self.text_tokenizer = TextTokenizer(content, encoding)
+        # ルートノードのメッシュが読み込み済みか / Whether the mesh of the root node has been read
+        self.has_root_mesh = has_root_mesh
+        self.progress = progress
+
+    def parse(self) -> XModelNode:
+        root_node = XModelNode()
+        parsers = {
+            "Mesh": lambda: self.parse_top_level_mesh_text(root_node),
+            "Material": lambda: self.parse_material_text(root_node.mesh),
+            "Frame": lambda: self.parse_frame_text(root_node),
+        }
+        if self.progress is not None:
+            tokenizer = self.text_tokenizer
+            parsers = {name: report_after(parser, lambda: self.progress.set_position(tokenizer.pos / max(1, len(tokenizer.content)))) for name, parser in parsers.items()}
+        self.parse_block_text(parsers)
+        resolve_mesh_references(root_node)
+        return root_node
+
+    def parse_top_level_mesh_text(self, root_node: XModelNode):
+        mesh = XModelMesh()
+        self.parse_mesh_text(mesh)
+        add_top_level_mesh(root_node, mesh, self.has_root_mesh)
+        self.has_root_mesh = True
+
+    # ブロック内のデータオブジェクトを対応する関数で読み込む / Parse the data objects in a block with the matching parsers
+    # 名前の後の { は未対応のブロックの始まりで、{ 名前 } だけをデータの参照として扱う /
+    #  A { after a name starts an unknown block, and only a bare { name } is treated as a data reference
+    def parse_block_text(self, parsers):
+        tokenizer = self.text_tokenizer
+        brace_count = tokenizer.brace_count
+        # 直前のトークンが未対応のブロックの名前(または種類)か / Whether the previous token is the name (or type) of an unknown block
+        named = False
+        token = tokenizer.get_next_token()
+        while token != None and tokenizer.brace_count >= brace_count:
+            if token == "{":
+                parser = parsers.get("{")
+                if parser is not None and not named:
+                    # データの参照 / Data reference
+                    parser()
+                else:
+                    # 未対応のブロックは読み飛ばす / Skip unknown blocks
+                    tokenizer.skip_block()
+                named = False
+            elif token == "template":
+                # テンプレートは使用する必要がないため無視する / Ignore templates as they are not needed
+                tokenizer.get_next_token()
+                tokenizer.skip_next_token("{")
+                tokenizer.skip_block()
+                named = False
+            else:
+                parser = parsers.get(token)
+                if parser is not None:
+                    parser()
+                named = parser is None and token not in TEXT_SYMBOLS
+            token = tokenizer.get_next_token()
+
+    def parse_mesh_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        mesh.name = tokenizer.get_object_name()
+        vertex_size = tokenizer.get_next_int()
+        vertices = tokenizer.get_float_array(vertex_size * 3)
+        mesh.vertices = vertices
+        faces_size = tokenizer.get_next_int()
+        mesh.face_indices, mesh.face_offsets = tokenizer.get_face_arrays(faces_size)
+
+        self.parse_block_text({
+            "MeshMaterialList": lambda: self.parse_mesh_material_list_text(mesh),
+            "MeshTextureCoords": lambda: self.parse_mesh_texture_coords_text(mesh),
+        })
+
+    def parse_mesh_texture_coords_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        vertex_size = tokenizer.get_next_int()
+        tex_coords = tokenizer.get_float_array(vertex_size * 2)
+        mesh.tex_coords = tex_coords
+        tokenizer.skip_block()
+
+    def parse_mesh_material_list_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        mesh.material_count = tokenizer.get_next_int()
+        face_count = tokenizer.get_next_int()
+        mesh.material_face_indexes = tokenizer.get_int_array(face_count)
+
+        self.parse_block_text({
+            "Material": lambda: self.parse_material_text(mesh),
+        })
+
+    def parse_material_text(self, mesh: XModelMesh):
+        tokenizer = self.text_tokenizer
+        object_name = tokenizer.get_object_name()
+        values = tokenizer.get_float_array(11)
+        material = XMaterial()
+        material.face_color = (values[0], values[1], values[2], values[3])
+        material.power = values[4]
+        material.specular_color = (values[5], values[6], values[7])
+        material.emission_color = (values[8], values[9], values[10])
+        material.name = object_name
+
+        self.parse_block_text({
+            "TextureFilename": lambda: self.parse_texture_filename_text(material),
+        })
+        mesh.materials.append(material)
+
+    def parse_texture_filename_text(self, material: XMaterial):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        material.texture_path = tokenizer.get_next_string()
+        tokenizer.skip_block()
+
+    def parse_frame_text(self, node: XModelNode):
+        tokenizer = self.text_tokenizer
+        child = XModelNode()
+        child.node_name = tokenizer.get_object_name()
+        child.is_frame = True
+
+        self.parse_block_text({
+            "FrameTransformMatrix": lambda: self.parse_frame_transform_matrix_text(child),
+            "Mesh": lambda: self.parse_mesh_text(get_frame_mesh_node(child).mesh),
+            "Frame": lambda: self.parse_frame_text(child),
+            "{": lambda: self.parse_mesh_reference_text(child),
+        })
+        node.children.append(child)
+
+    # { 名前 } または { 名前 GUID } / { name } or { name GUID }
+    def parse_mesh_reference_text(self, node: XModelNode):
+        tokenizer = self.text_tokenizer
+        name = tokenizer.get_next_token()
+        if name == "}":
+            return
+        if name is not None and not name.startswith("<"):
+            get_frame_mesh_node(node).mesh_reference = name
+        tokenizer.skip_block()
+
+    def parse_frame_transform_matrix_text(self, node: XModelNode):
+        tokenizer = self.text_tokenizer
+        tokenizer.get_object_name()
+        values = tokenizer.get_float_array(16)
+        node.transform_matrix = [
+            values[0:4].tolist(),
+            values[4:8].tolist(),
+            values[8:12].tolist(),
+            values[12:16].tolist()
+        ]
+        tokenizer.skip_block()
+
+
+# バイナリ形式のXファイルのパーサー / Parser for binary X files
+# payload はXファイルのヘッダー(16バイト)より後ろの展開済みのデータ / payload is the decompressed data after the 16-byte X file header
+class XBinaryParser:
+
+    def __init__(self, payload, float_size: int = 32, progress: ParseProgress | None = None):
+        self.token_index = BinaryTokenIndex(ByteReader(payload), float_size)
+        self.token_pos = 0
+        self.has_root_mesh = False
+        self.progress = progress
+
+    # ブロックの開始位置まで進み、オブジェクト名と対応する閉じ括弧の位置を返す /
+    #  Advance to the opening brace and return the object name and the index of the matching closing brace
+    def open_block_bin(self):
+        index = self.token_index
+        i = self.token_pos
+        name = ""
+        if i < len(index) and index.kinds[i] == TOKEN_NAME:
+            name = index.get_string(i)
+            i += 1
+        if i < len(index) and index.kinds[i] == TOKEN_GUID:
+            i += 1
+        if i >= len(index) or index.kinds[i] != TOKEN_OBRACE:
+            raise Exception("Unexpected token")
+        self.token_pos = i + 1
+        return name, index.match(i)
+
+    # 指定した種類のトークンまで進む / Advance to the next token of the given kind
+    def find_token_bin(self, kind, end):
+        kinds = self.token_index.kinds
+        i = self.token_pos
+        while i < end and kinds[i] != kind:
+            i += 1
+        if i >= end:
+            raise Exception("Unexpected end of block")
+        self.token_pos = i + 1
+        return i
+
+    # ブロック内のデータオブジェクトを対応する関数で読み込む / Parse the data objects in a block with the matching parsers
+    # 名前の後の { は未対応のブロックの始まりで、{ 名前 } だけをデータの参照として扱う /
+    #  A { after a name starts an unknown block, and only a bare { name } is treated as a data reference
+    def parse_block_bin(self, end, parsers):
+        index = self.token_index
+        kinds = index.kinds
+        # 直前のトークンが未対応のブロックの名前、種類またはGUIDか / Whether the previous token is the name, type or GUID of an unknown block
+        named = False
+        while self.token_pos < end:
+            i = self.token_pos
+            self.token_pos += 1
+            kind = kinds[i]
+            if kind == TOKEN_OBRACE:
+                parser = parsers.get("{")
+                if parser is not None and not named:
+                    # データの参照 / Data reference
+                    parser()
+                # 未対応のブロックは読み飛ばす / Skip unknown blocks
+                self.token_pos = index.match(i) + 1
+                named = False
+            elif kind == TOKEN_TEMPLATE:
+                # テンプレートは使用する必要がないため無視する / Ignore templates as they are not needed
+                self.token_pos = index.match(self.find_token_bin(TOKEN_OBRACE, end)) + 1
+                named = False
+            elif kind == TOKEN_NAME:
+                parser = parsers.get(index.get_string(i))
+                if parser is not None:
+                    parser()
+                named = parser is None
+            else:
+                named = kind == TOKEN_GUID and named
+        self.token_pos = end + 1
+
+    def parse(self) -> XModelNode:
+        root_node = XModelNode()
+        self.has_root_mesh = False
+        parsers = {
+            "Mesh": lambda: self.parse_top_level_mesh_bin(root_node),
+            "Material": lambda: self.parse_material_bin(root_node.mesh),
+            "Frame": lambda: self.parse_frame_bin(root_node),
+        }
+        if self.progress is not None:
+            parsers = {name: report_after(parser, lambda: self.progress.set_position(self.token_pos / max(1, len(self.token_index)))) for name, parser in parsers.items()}
+        self.parse_block_bin(len(self.token_index), parsers)
+        resolve_mesh_references(root_node)
+        return root_node
+
+    def parse_top_level_mesh_bin(self, root_node: XModelNode):
+        mesh = XModelMesh()
+        self.parse_mesh_bin(mesh)
+        add_top_level_mesh(root_node, mesh, self.has_root_mesh)
+        self.has_root_mesh = True
+
+    def parse_mesh_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        mesh.name, end = self.open_block_bin()
+        vertex_size = index.get_int_list(self.find_token_bin(TOKEN_INTEGER_LIST, end))[0]
+        vertices = index.get_float_list(self.find_token_bin(TOKEN_FLOAT_LIST, end))
+        mesh.vertices = vertices[0:vertex_size * 3]
+        faces_list = index.get_int_list(self.find_token_bin(TOKEN_INTEGER_LIST, end))
+        mesh.face_indices, mesh.face_offsets = split_face_list(faces_list, 1)
+
+        self.parse_block_bin(end, {
+            "MeshTextureCoords": lambda: self.parse_mesh_texture_coords_bin(mesh),
+            "MeshMaterialList": lambda: self.parse_mesh_material_list_bin(mesh),
+        })
+
+    def parse_mesh_texture_coords_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        name, end = self.open_block_bin()
+        self.find_token_bin(TOKEN_INTEGER_LIST, end)
+        tex_coords = index.get_float_list(self.find_token_bin(TOKEN_FLOAT_LIST, end))
+        mesh.tex_coords = tex_coords[0:len(tex_coords) // 2 * 2]
+        self.token_pos = end + 1
+
+    def parse_mesh_material_list_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        name, end = self.open_block_bin()
+        integer_list = index.get_int_list(self.find_token_bin(TOKEN_INTEGER_LIST, end))
+        mesh.material_count = integer_list[0]
+        mesh.material_face_indexes = integer_list[2:integer_list[1] + 2]
+        self.parse_block_bin(end, {
+            "Material": lambda: self.parse_material_bin(mesh),
+        })
+
+    def parse_material_bin(self, mesh: XModelMesh):
+        index = self.token_index
+        material_name, end = self.open_block_bin()
+        values = index.get_float_list(self.find_token_bin(TOKEN_FLOAT_LIST, end))
+        material = XMaterial()
+        material.name = material_name
+        material.face_color = (values[0], values[1], values[2], values[3])
+        material.power = values[4]
+        material.specular_color = (values[5], values[6], values[7])
+        material.emission_color = (values[8], values[9], values[10])
+        self.parse_block_bin(end, {
+            "TextureFilename": lambda: self.parse_texture_filename_bin(material),
+        })
+        mesh.materials.append(material)
+
+    def parse_texture_filename_bin(self, material: XMaterial):
+        name, end = self.open_block_bin()
+        material.texture_path = self.token_index.get_string(self.find_token_bin(TOKEN_STRING, end))
+        self.token_pos = end + 1
+
+    def parse_frame_bin(self, node: XModelNode):
+        child = XModelNode()
+        child.node_name, end = self.open_block_bin()
+        child.is_frame = True
+        self.parse_block_bin(end, {
+            "FrameTransformMatrix": lambda: self.parse_frame_transform_matrix_bin(child),
+            "Mesh": lambda: self.parse_mesh_bin(get_frame_mesh_node(child).mesh),
+            "Frame": lambda: self.parse_frame_bin(child),
+            "{": lambda: self.parse_mesh_reference_bin(child),
+        })
+        node.children.append(child)
+
+    # { 名前 } または { 名前 GUID } / { name } or { name GUID }
+    # 閉じ括弧の後ろへは parse_block_bin が進める / parse_block_bin advances past the closing brace
+    def parse_mesh_reference_bin(self, node: XModelNode):
+        index = self.token_index
+        i = self.token_pos
+        if i < len(index) and index.kinds[i] == TOKEN_NAME:
+            get_frame_mesh_node(node).mesh_reference = index.get_string(i)
+
+    def parse_frame_transform_matrix_bin(self, node: XModelNode):
+        name, end = self.open_block_bin()
+        values = self.token_index.get_float_list(self.find_token_bin(TOKEN_FLOAT_LIST, end))
+        node.transform_matrix = [
+            values[0:4].tolist(),
+            values[4:8].tolist(),
+            values[8:12].tolist(),
+            values[12:16].tolist()
+        ]
+        self.token_pos = end + 1
+
+
+# 最上位のデータオブジェクトの範囲を取得する / Get the ranges of the top-level data objects
+# 戻り値は (開始位置, 終了位置, 種類) のリスト / Returns a list of (start, end, type name)
+# 位置はトークナイザーの content (ASCII互換でないエンコーディングでは変換後の文字列)の位置 /
+#  Positions are in the content of the tokenizer (the decoded str with encodings that are not ASCII-compatible)
+def find_top_level_blocks(content, encoding: str | None = None) -> list[tuple[int, int, str]]:
+    tokenizer = TextTokenizer(content, encoding)
+    content = tokenizer.content
+    brace_table = tokenizer.get_brace_table()
+    # ヘッダーを読み飛ばす / Skip the header
+    tokenizer.pos = 16
+    blocks = []
+    start = None
+    type_name = None
+    while True:
+        span = tokenizer.get_next_span()
+        if span is None:
+            break
+        if content[span[0]:span[1]] == tokenizer.syntax.open_brace:
+            end = brace_table.get(span[0])
+            end = len(content) if end is None else end + 1
+            if start is not None:
+                blocks.append((start, end, type_name))
+            tokenizer.pos = end
+            tokenizer.brace_count = 0
+            tokenizer.open_braces = []
+            start = None
+        elif start is None:
+            start = span[0]
+            type_name = tokenizer.decode(content[span[0]:span[1]])
+    return blocks
+
+
+# ワーカープロセスで解析した結果をこのモジュールのクラスとして読み込む /
+#  Load the results parsed in a worker process as the classes of this module
+class _ResultUnpickler(pickle.Unpickler):
+
+    def find_class(self, module, name):
+        if module == __name__.rsplit(".", 1)[-1]:
+            return globals()[name]
+        return super().find_class(module, name)
+
+
+# ワーカープロセスでこのモジュールの関数を呼び出すための参照 / Reference to a function of this module for worker processes
+# アドオンのパッケージ名に依存しないように、ワーカーではこのモジュールを単体で読み込む /
+#  Workers import this module on its own so that they do not depend on the package name of the add-on
+class WorkerFunction:
+
+    def __init__(self, name: str, module_name: str = __name__):
+        self.name = name
+        self.module_name = module_name.rsplit(".", 1)[-1]
+
+    def __reduce__(self):
+        return getattr, (_WorkerModule(self.module_name), self.name)
+
+
+class _WorkerModule:
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+
+    def __reduce__(self):
+        return importlib.import_module, (self.module_name,)
+
+
+# ワーカープロセスのプールを作成する / Create a pool of worker processes
+# bpyを含むBlenderのプロセスを複製しないようにspawnで起動し、アドオンのフォルダーからモジュールを読み込めるようにする /
+#  Use spawn so that the Blender process with bpy is not forked, and let workers import modules from the add-on folder
+def create_worker_pool(max_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=site.addsitedir,
+        initargs=(os.path.dirname(os.path.abspath(__file__)),),
+    )
+
+
+# ワーカープロセスで1つのチャンクを解析する / Parse one chunk in a worker process
+def parse_text_chunk(content: bytes | str, encoding: str, has_root_mesh: bool) -> bytes:
+    return pickle.dumps(XTextParser(content, encoding, has_root_mesh).parse(), pickle.HIGHEST_PROTOCOL)
+
+
+# チャンクの解析結果をルートノードに追加する / Merge the result of a chunk into the root node
+def merge_top_level(root_node: XModelNode, part: XModelNode):
+    if len(part.mesh.vertices) > 0:
+        add_top_level_mesh(root_node, part.mesh, False)
+    else:
+        root_node.mesh.materials.extend(part.mesh.materials)
+    root_node.children.extend(part.children)
+
+
+# ワーカープロセスに渡すチャンク(mmapなどはbytesにする) / Chunk passed to a worker process (mmap and such become bytes)
+def get_chunk(content, start: int, end: int) -> bytes | str:
+    chunk = content[start:end]
+    return chunk if isinstance(chunk, str) else bytes(chunk)
+
+
+# テキスト形式のXファイルを最上位のデータオブジェクトごとに複数のプロセスで解析する /
+#  Parse a text X file in multiple processes, split at the top-level data objects
+# 結果は順番に結合するため、1つのプロセスで解析した場合と同じになる / Results are merged in order, so they match a sequential parse
+def parse_text_parallel(content, encoding: str | None = None, max_workers: int | None = None) -> XModelNode:
+    parser = XTextParser(content, encoding)
+    encoding = parser.text_tokenizer.encoding
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if len(content) < PARALLEL_MIN_SIZE or max_workers < 2:
+        return parser.parse()
+    # ASCII互換でないエンコーディングでは変換後の文字列を分割する / With encodings that are not ASCII-compatible, the decoded str is split
+    content = parser.text_tokenizer.content
+    blocks = [block for block in find_top_level_blocks(content, encoding) if block[2] in TOP_LEVEL_OBJECTS]
+    if len(blocks) < 2:
+        return parser.parse()
+
+    # 大きさがほぼ同じになるように連続したブロックをチャンクにまとめる / Group consecutive blocks into chunks of similar size
+    chunk_size = sum(end - start for start, end, type_name in blocks) // (max_workers * CHUNKS_PER_WORKER) + 1
+    chunks = []
+    has_root_mesh = False
+    chunk_start = None
+    chunk_has_root_mesh = False
+    for start, end, type_name in blocks:
+        if chunk_start is None:
+            chunk_start = start
+            chunk_has_root_mesh = has_root_mesh
+        if type_name == "Mesh":
+            has_root_mesh = True
+        if end - chunk_start >= chunk_size:
+            chunks.append((get_chunk(content, chunk_start, end), chunk_has_root_mesh))
+            chunk_start = None
+    if chunk_start is not None:
+        chunks.append((get_chunk(content, chunk_start, blocks[-1][1]), chunk_has_root_mesh))
+
+    with create_worker_pool(min(max_workers, len(chunks))) as executor:
+        results = executor.map(
+            WorkerFunction("parse_text_chunk"),
+            [chunk for chunk, chunk_has_root_mesh in chunks],
+            [encoding] * len(chunks),
+            [chunk_has_root_mesh for chunk, chunk_has_root_mesh in chunks],
+        )
+        root_node = XModelNode()
+        for result in results:
+            merge_top_level(root_node, _ResultUnpickler(io.BytesIO(result)).load())
+    # 別のチャンクのメッシュへの参照を解決する / Resolve references to meshes in other chunks
+    resolve_mesh_references(root_node)
+    return root_node
+
+
+# Xファイルではないデータを読み込んだ / The data is not an X file
+class NotXFileError(Exception):
+    pass
+
+
+# ヘッダーからフォーマット("txt ", "bin ", "bzip")と浮動小数点数のビット数を取得する /
+#  Get the format ("txt ", "bin ", "bzip") and the float size in bits from the header
+def read_header(data) -> tuple[str, int]:
+    header = bytes(data[0:16])
+    if len(header) < 16 or header[0:4] != b'xof ':
+        raise NotXFileError("This file is not X file!")
+    return header[8:12].decode("ascii", "replace"), int(header[12:16].decode())
+
+
+# バイナリ形式のXファイルのヘッダーより後ろのデータを取得する / Get the data after the header of a binary X file
+def get_binary_payload(data, file_format: str, progress: ParseProgress | None = None):
+    payload = memoryview(data)[16:]
+    # flate圧縮 / Flate compression
+    if file_format == "bzip":
+        payload = mszip.decompress(payload, progress=progress.set_blocks if progress is not None else None)
+    return payload
+
+
+# Xファイルのデータ(bytes, bytearray, mmapなど)を解析する / Parse the data of an X file (bytes, bytearray, mmap...)
+# progress を指定した場合は並列に解析しない / Not parsed in parallel when progress is given
+def parse_data(data, parallel: bool = False, progress: ParseProgress | None = None) -> XModelNode:
+    file_format, float_size = read_header(data)
+    if file_format not in ("bin ", "bzip"):
+        # テキスト / Text
+        if parallel and progress is None:
+            return parse_text_parallel(data)
+        return XTextParser(data, progress=progress).parse()
+
+    # バイナリ / Binary
+    payload = get_binary_payload(data, file_format, progress)
+    parser = XBinaryParser(payload, float_size, progress)
+    try:
+        return parser.parse()
+    finally:
+        # mmapを閉じられるように参照を解放する / Release the references so that the mmap can be closed
+        parser.token_index.reader.release()
+        if isinstance(payload, memoryview):
+            payload.release()
+
+
+# ファイルのパス、バイト列、またはファイルオブジェクトからデータを読み込み、process に渡す /
+#  Read the data from a file path, a bytes-like object or a file object and pass it to process
+def process_source(source, process):
+    if isinstance(source, (str, os.PathLike)):
+        # ファイルを1回だけ開いてメモリにマップし、コピーせずに読み込む / Open the file only once and memory-map it to read it without copying
+        with open(source, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # 空のファイルやマップできないファイル / Empty files or files that cannot be mapped
+                return process(f.read())
+            try:
+                return process(data)
+            finally:
+                try:
+                    data.close()
+                except BufferError:
+                    # 残っている参照が解放された時に閉じられる / Closed when the remaining references are released
+                    pass
+    if hasattr(source, "read"):
+        return process(source.read())
+    return process(source)
+
+
+# Xファイルを解析する / Parse an X file
+# source はファイルのパス、バイト列、またはファイルオブジェクト / source is a file path, a bytes-like object or a file object
+def parse(source, parallel: bool = False, progress: ParseProgress | None = None) -> XModelNode:
+    return process_source(source, lambda data: parse_data(data, parallel, progress))
+
+
+# ワーカープロセスで1つのファイルを解析する / Parse one file in a worker process
+# 例外はアドオンのパッケージ名に依存せずに戻せるように、結果と一緒にpickleする /
+#  Exceptions are pickled with the result so that they can be returned without depending on the package name of the add-on
+def parse_file(path: str) -> bytes:
+    try:
+        result = (parse(path), None)
+    except Exception as e:
+        result = (None, e)
+    return pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+
+# 複数のファイルを順番に解析し、(パス, ノード, 例外) を返す / Parse multiple files in order, yielding (path, node, exception)
+# ワーカープロセスが先のファイルを解析している間に、呼び出し側は解析済みのファイルを処理できる /
+#  While worker processes parse the following files, the caller can process the files already parsed
+def parse_files(paths: list[str], max_workers: int | None = None):
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if len(paths) < 2 or max_workers < 2:
+        for path in paths:
+            try:
+                yield path, parse(path), None
+            except Exception as e:
+                yield path, None, e
+        return
+
+    max_workers = min(max_workers, len(paths))
+    with create_worker_pool(max_workers) as executor:
+        # 解析結果がたまりすぎないように、先に解析するファイルの数を制限する / Limit the files parsed ahead so that the results do not pile up
+        pending = deque()
+        remaining = iter(paths)
+        for path in remaining:
+            pending.append((path, executor.submit(WorkerFunction("parse_file"), path)))
+            if len(pending) >= max_workers * FILES_AHEAD_PER_WORKER:
+                break
+        try:
+            while len(pending) > 0:
+                path, future = pending.popleft()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(WorkerFunction("parse_file"), next_path)))
+                node, error = _ResultUnpickler(io.BytesIO(future.result())).load()
+                yield path, node, error
+        finally:
+            # 途中で止めた場合はまだ始まっていない解析を取り消す / Cancel the parses not started yet when stopped midway
+            for path, future in pending:
+                future.cancel()
@@ -0,0 +1,200 @@
+from array import array
+
+import numpy as np
+
+try:
+    from .x_parser import XModelMesh, XModelNode, iterate_nodes
+except ImportError:
+    from x_parser import XModelMesh, XModelNode, iterate_nodes
+
+
+# 検証で修正した数 / Counts of the repairs made by the validation
+class ValidationReport:
+    __slots__ = (
+        "invalid_index_faces",
+        "repeated_vertex_faces",
+        "degenerate_faces",
+        "duplicate_faces",
+        "missing_material_indexes",
+        "invalid_material_indexes",
+        "uv_mismatches",
+    )
+
+    def __init__(self):
+        # 範囲外の頂点インデックスを含むため削除した面 / Faces removed because they contain vertex indexes out of range
+        self.invalid_index_faces = 0
+        # 同じ頂点を2回以上使っていたため、重複を取り除いた面 / Faces that used the same vertex more than once, with the repeats removed
+        self.repeated_vertex_faces = 0
+        # 頂点が3つ未満のため削除した面 / Faces removed because they have less than 3 vertices
+        self.degenerate_faces = 0
+        # 同じマテリアルで同じ頂点を同じ順番で使う面が前にあるため削除した面 /
+        #  Faces removed because an earlier face uses the same vertices in the same order with the same material
+        self.duplicate_faces = 0
+        # マテリアルのインデックスがなかった面 / Faces that had no material index
+        self.missing_material_indexes = 0
+        # マテリアルのインデックスが範囲外だった面 / Faces whose material index was out of range
+        self.invalid_material_indexes = 0
+        # UVの数が頂点の数と違ったメッシュ / Meshes whose UV count differed from the vertex count
+        self.uv_mismatches = 0
+
+    def total(self) -> int:
+        return sum(getattr(self, name) for name in self.__slots__)
+
+
+# ノード以下のメッシュを検証し、修正する / Validate and repair the meshes under a node
+# 共有されたメッシュは1回だけ検証する / Shared meshes are validated only once
+def validate_node(root_node: XModelNode, report: ValidationReport | None = None) -> ValidationReport:
+    if report is None:
+        report = ValidationReport()
+    validated = set()
+    for node in iterate_nodes(root_node):
+        if id(node.mesh) not in validated:
+            validated.add(id(node.mesh))
+            validate_mesh(node.mesh, report)
+    return report
+
+
+# 配列をまとめて検証し、壊れた面を修正または削除する / Validate the arrays in bulk, and repair or remove broken faces
+def validate_mesh(mesh: XModelMesh, report: ValidationReport):
+    # マテリアルのリストがないメッシュはインポートされないため、そのままにする(インポートされるかどうかは検証で変えない) /
+    #  Meshes without a material list are not imported, so they are left as they are (the validation does not change which meshes are imported)
+    if mesh.material_count == 0:
+        return
+    vertex_count = mesh.vertex_count()
+    if len(mesh.vertices) != vertex_count * 3:
+        mesh.vertices = mesh.vertices[:vertex_count * 3]
+    validate_tex_coords(mesh, vertex_count, report)
+
+    face_offsets = np.asarray(mesh.face_offsets, dtype=np.int64)
+    face_indices = np.asarray(mesh.face_indices, dtype=np.int64)
+    face_count = len(face_offsets) - 1
+    if face_count <= 0:
+        return
+    loop_totals = np.diff(face_offsets)
+    loop_faces = np.repeat(np.arange(face_count), loop_totals)
+
+    face_materials, materials_changed = validate_material_indexes(mesh, face_count, report)
+
+    # 範囲外の頂点インデックス / Vertex indexes out of range
+    invalid_loops = face_indices >= vertex_count
+    invalid_faces = np.zeros(face_count, dtype=bool)
+    invalid_faces[loop_faces[invalid_loops]] = True
+    report.invalid_index_faces += int(np.count_nonzero(invalid_faces))
+
+    # インポート時と同じく、同じ座標の頂点は同じ頂点として扱う / As in the import, vertices at the same coordinate are treated as the same vertex
+    loop_groups = np.full(len(face_indices), -1, dtype=np.int64)
+    if vertex_count > 0:
+        positions = np.asarray(mesh.vertices, dtype=np.float64).reshape(-1, 3) + 0.0
+        vertex_groups = np.unique(positions, axis=0, return_inverse=True)[1].reshape(-1)
+        loop_groups[~invalid_loops] = vertex_groups[face_indices[~invalid_loops]]
+
+    # 面の中で2回目以降に出てくる頂点を取り除く / Remove the vertices that appear again within a face
+    order = np.lexsort((np.arange(len(loop_groups)), loop_groups, loop_faces))
+    repeated = np.zeros(len(loop_groups), dtype=bool)
+    repeated[order[1:]] = (loop_faces[order[1:]] == loop_faces[order[:-1]]) & (loop_groups[order[1:]] == loop_groups[order[:-1]])
+    repeated_faces = np.zeros(face_count, dtype=bool)
+    repeated_faces[loop_faces[repeated]] = True
+    repeated_faces &= ~invalid_faces
+    report.repeated_vertex_faces += int(np.count_nonzero(repeated_faces))
+    kept_loops = ~repeated
+    kept_totals = np.bincount(loop_faces[kept_loops], minlength=face_count)
+
+    # 頂点が3つ未満の面 / Faces with less than 3 vertices
+    degenerate_faces = (kept_totals < 3) & ~invalid_faces
+    report.degenerate_faces += int(np.count_nonzero(degenerate_faces))
+    valid_faces = ~invalid_faces & ~degenerate_faces
+
+    duplicate_faces = find_duplicate_faces(loop_faces[kept_loops], loop_groups[kept_loops], kept_totals, face_materials, valid_faces)
+    report.duplicate_faces += int(np.count_nonzero(duplicate_faces))
+    valid_faces &= ~duplicate_faces
+
+    if np.all(valid_faces) and not np.any(repeated):
+        if materials_changed:
+            mesh.material_face_indexes = to_array('I', face_materials)
+        return
+    kept_loops &= valid_faces[loop_faces]
+    mesh.face_indices = to_array('I', face_indices[kept_loops])
+    mesh.face_offsets = to_array('I', np.concatenate(([0], np.cumsum(kept_totals[valid_faces]))))
+    mesh.material_face_indexes = to_array('I', face_materials[valid_faces])
+
+
+# 面ごとのマテリアルのインデックス / Material index of each face
+# マテリアルの指定がない面はマテリアル0にする(検証の有無によらず同じ) / Faces without a material index use material 0 (with or without the validation)
+def get_face_materials(mesh: XModelMesh, face_count: int) -> np.ndarray:
+    face_materials = np.zeros(face_count, dtype=np.int64)
+    material_face_indexes = np.asarray(mesh.material_face_indexes, dtype=np.int64)[:face_count]
+    face_materials[:len(material_face_indexes)] = material_face_indexes
+    return face_materials
+
+
+# マテリアルのインデックスを面の数に合わせ、範囲外のものを0にする / Match the material indexes to the face count and set the ones out of range to 0
+def validate_material_indexes(mesh: XModelMesh, face_count: int, report: ValidationReport) -> tuple[np.ndarray, bool]:
+    changed = len(mesh.material_face_indexes) != face_count
+    report.missing_material_indexes += max(0, face_count - len(mesh.material_face_indexes))
+    face_materials = get_face_materials(mesh, face_count)
+    invalid = face_materials >= mesh.material_count
+    if np.any(invalid):
+        report.invalid_material_indexes += int(np.count_nonzero(invalid))
+        face_materials[invalid] = 0
+        changed = True
+    return face_materials, changed
+
+
+# 同じマテリアルで同じ頂点を同じ順番(開始位置は問わない)で使う面のうち、2つ目以降を探す /
+#  Find the second and later faces that use the same vertices in the same order (from any start) with the same material
+# 裏表を作るために逆順にした面は重複として扱わない / Faces reversed to make both sides are not treated as duplicates
+def find_duplicate_faces(loop_faces: np.ndarray, loop_groups: np.ndarray, loop_totals: np.ndarray, face_materials: np.ndarray, valid_faces: np.ndarray) -> np.ndarray:
+    duplicate_faces = np.zeros(len(loop_totals), dtype=bool)
+    valid_loops = valid_faces[loop_faces]
+    loop_faces = loop_faces[valid_loops]
+    loop_groups = loop_groups[valid_loops]
+    if len(loop_faces) == 0:
+        return duplicate_faces
+    ranks = np.arange(len(loop_faces)) - (np.cumsum(loop_totals * valid_faces) - loop_totals * valid_faces)[loop_faces]
+
+    # 一番小さい頂点から始まるように回す / Rotate each face so that it starts at its smallest vertex
+    face_starts = np.flatnonzero(np.concatenate(([True], loop_faces[1:] != loop_faces[:-1])))
+    minimums = np.minimum.reduceat(loop_groups, face_starts)
+    faces = loop_faces[face_starts]
+    is_minimum = loop_groups == np.repeat(minimums, np.diff(np.append(face_starts, len(loop_faces))))
+    minimum_loops = np.flatnonzero(is_minimum)
+    first_minimums = minimum_loops[np.unique(loop_faces[minimum_loops], return_index=True)[1]]
+    shifts = np.zeros(len(loop_totals), dtype=np.int64)
+    shifts[faces] = ranks[first_minimums]
+    rotated_ranks = (ranks - shifts[loop_faces]) % loop_totals[loop_faces]
+
+    # 頂点数ごとに (マテリアル, 頂点...) の行を比べる / Compare the rows of (material, vertices...) for each vertex count
+    for size in np.unique(loop_totals[faces]):
+        size_faces = faces[loop_totals[faces] == size]
+        rows = np.empty((len(size_faces), size + 1), dtype=np.int64)
+        rows[:, 0] = face_materials[size_faces]
+        row_indexes = np.full(len(loop_totals), -1, dtype=np.int64)
+        row_indexes[size_faces] = np.arange(len(size_faces))
+        size_loops = row_indexes[loop_faces] >= 0
+        rows[row_indexes[loop_faces[size_loops]], rotated_ranks[size_loops] + 1] = loop_groups[size_loops]
+        first_rows = np.unique(rows, axis=0, return_index=True)[1]
+        duplicates = np.ones(len(size_faces), dtype=bool)
+        duplicates[first_rows] = False
+        duplicate_faces[size_faces[duplicates]] = True
+    return duplicate_faces
+
+
+# UVの数を頂点の数に合わせる / Match the UV count to the vertex count
+def validate_tex_coords(mesh: XModelMesh, vertex_count: int, report: ValidationReport):
+    tex_coord_count = mesh.tex_coord_count()
+    if tex_coord_count == 0 or tex_coord_count == vertex_count:
+        if len(mesh.tex_coords) != tex_coord_count * 2:
+            mesh.tex_coords = mesh.tex_coords[:tex_coord_count * 2]
+        return
+    report.uv_mismatches += 1
+    if tex_coord_count > vertex_count:
+        mesh.tex_coords = mesh.tex_coords[:vertex_count * 2]
+    else:
+        # 足りないUVは(0, 0)にする / Missing UVs are (0, 0)
+        tex_coords = array(mesh.tex_coords.typecode, mesh.tex_coords[:tex_coord_count * 2])
+        tex_coords.extend([0.0] * ((vertex_count - tex_coord_count) * 2))
+        mesh.tex_coords = tex_coords
+
+
+def to_array(typecode: str, values: np.ndarray) -> array:
+    return array(typecode, values.astype(np.uint32 if typecode == 'I' else np.float64).tobytes())
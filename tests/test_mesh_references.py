@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import x_parser
+
+X_FILE = b"""xof 0302txt 0032
+Mesh Wheel {
+ 3;
+ 0.0;0.0;0.0;,
+ 1.0;0.0;0.0;,
+ 0.0;1.0;0.0;;
+ 1;
+ 3;0,1,2;;
+}
+Frame F {
+ AnimKey { 1; 2; 3; }
+ SomeData named <1234-5678> { Wheel }
+ FrameTransformMatrix {
+  1.0,0.0,0.0,0.0,0.0,1.0,0.0,0.0,0.0,0.0,1.0,0.0,0.0,0.0,0.0,1.0;;
+ }
+ { Wheel }
+}
+Frame G {
+ AnimKey { Wheel }
+}
+"""
+
+
+class MeshReferenceTest(unittest.TestCase):
+
+    def test_only_bare_braces_are_references(self):
+        root_node = x_parser.parse(X_FILE)
+        frame_f, frame_g = root_node.children
+        # 名前付きの未対応のブロックは子ノードにならない / Unknown named blocks do not become child nodes
+        self.assertEqual(frame_f.children, [])
+        self.assertIs(frame_f.mesh, root_node.mesh)
+        self.assertEqual(frame_g.children, [])
+        self.assertEqual(len(frame_g.mesh.face_offsets) - 1, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
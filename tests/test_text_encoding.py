@@ -0,0 +1,82 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import x_parser
+from text_tokenizer import TextTokenizer
+
+# 2バイト目が [ \ { } になる文字を含む名前とテクスチャのパス / Names and texture paths with characters whose second byte is [ \ { }
+# ー: 81 5B, ソ: 83 5C, 表: 95 5C, ボ: 83 7B, マ: 83 7D
+MATERIAL_NAMES = ["ハーフ", "ボマ"]
+TEXTURE_PATHS = ["表示ソ.png", "ボーマ/ソ.bmp"]
+CP932_X_FILE = """xof 0302txt 0032
+Mesh 構造 {
+ 3;
+ 0.0;0.0;0.0;,
+ 1.0;0.0;0.0;,
+ 0.0;1.0;0.0;;
+ 2;
+ 3;0,1,2;,
+ 3;0,2,1;;
+ MeshMaterialList {
+  2;
+  2;
+  0,
+  1;;
+  Material ハーフ {
+   1.0;1.0;1.0;1.0;;
+   0.0;
+   0.0;0.0;0.0;;
+   0.0;0.0;0.0;;
+   TextureFilename {
+    "表示ソ.png";
+   }
+  }
+  Material ボマ {
+   1.0;1.0;1.0;1.0;;
+   0.0;
+   0.0;0.0;0.0;;
+   0.0;0.0;0.0;;
+   TextureFilename {
+    "ボーマ/ソ.bmp";
+   }
+  }
+ }
+}
+Frame 申 {
+ FrameTransformMatrix {
+  1.0,0.0,0.0,0.0,0.0,1.0,0.0,0.0,0.0,0.0,1.0,0.0,0.0,0.0,0.0,1.0;;
+ }
+}
+""".encode("cp932")
+
+
+class TextEncodingTest(unittest.TestCase):
+
+    def test_cp932_names_and_texture_paths(self):
+        root_node = x_parser.XTextParser(CP932_X_FILE, "cp932").parse()
+        self.assertEqual(root_node.mesh.name, "構造")
+        self.assertEqual(len(root_node.mesh.face_offsets) - 1, 2)
+        self.assertEqual([material.name for material in root_node.mesh.materials], MATERIAL_NAMES)
+        self.assertEqual([material.texture_path for material in root_node.mesh.materials], TEXTURE_PATHS)
+        self.assertEqual([child.node_name for child in root_node.children], ["申"])
+
+    def test_cp932_top_level_blocks(self):
+        tokenizer = TextTokenizer(CP932_X_FILE, "cp932")
+        blocks = x_parser.find_top_level_blocks(CP932_X_FILE, "cp932")
+        self.assertEqual([type_name for start, end, type_name in blocks], ["Mesh", "Frame"])
+        self.assertTrue(tokenizer.content[blocks[-1][0]:blocks[-1][1]].startswith("Frame 申 {"))
+        self.assertTrue(tokenizer.content[blocks[-1][0]:blocks[-1][1]].endswith("}"))
+
+    def test_utf8_is_tokenized_as_bytes(self):
+        content = CP932_X_FILE.decode("cp932").encode("utf-8")
+        self.assertIsInstance(TextTokenizer(content, "utf-8").content, bytes)
+        root_node = x_parser.XTextParser(content, "utf-8").parse()
+        self.assertEqual([material.name for material in root_node.mesh.materials], MATERIAL_NAMES)
+        self.assertEqual([material.texture_path for material in root_node.mesh.materials], TEXTURE_PATHS)
+
+
+if __name__ == "__main__":
+    unittest.main()